@@ -0,0 +1,163 @@
+#!/usr/bin/env python3.10
+import argparse
+import logging
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from server import get_stock_data, calculate_ott, detect_signals_array, signal_position
+
+logger = logging.getLogger(__name__)
+
+TRADE_COLUMNS = ['side', 'entry_time', 'exit_time', 'entry_price', 'exit_price', 'bars_held', 'return', 'closed']
+
+def backtest_signals(data: pd.DataFrame, MAvg: pd.Series, OTT: pd.Series,
+                     slippage: float = 0.0, commission: float = 0.0,
+                     allow_short: bool = False, initial_capital: float = 100000.0) -> dict:
+    """
+    Simulate trading the detect_signals crossovers.
+    A signal on bar i fills at the open of bar i+1, so there is no lookahead.
+    slippage and commission are fractions of price / traded notional per side.
+    Positions keep their size from entry to exit (a short is not rebalanced
+    as the price moves), so trade returns compound to the equity curve.
+    """
+    closes = data['Close'].to_numpy(dtype=np.float64)
+    opens = data['Open'].to_numpy(dtype=np.float64) if 'Open' in data else closes
+    index = data.index
+    n = len(closes)
+    if n == 0:
+        empty = pd.Series(dtype=np.float64, index=index)
+        return {
+            'pnl': 0.0, 'total_return': 0.0, 'max_drawdown': 0.0, 'hit_rate': 0.0, 'num_trades': 0,
+            'equity': empty, 'drawdown': empty, 'trades': pd.DataFrame(columns=TRADE_COLUMNS),
+        }
+
+    buy, sell = detect_signals_array(MAvg.to_numpy(dtype=np.float64), OTT.to_numpy(dtype=np.float64))
+    target = signal_position(buy, sell, allow_short)
+
+    # Position held before (old) and after (new) the open of each bar
+    new_pos = np.zeros(n)
+    old_pos = np.zeros(n)
+    new_pos[1:] = target[:-1]
+    old_pos[2:] = target[:-2]
+    delta = new_pos - old_pos
+
+    exec_price = opens * (1 + slippage * np.sign(delta))
+    equity = pd.Series(_position_equity(closes, exec_price, new_pos, delta, commission, initial_capital),
+                       index=index)
+
+    trades = _extract_trades(index, closes, exec_price, new_pos, delta, commission)
+
+    drawdown = equity / equity.cummax() - 1
+    closed = trades[trades['closed']]
+    return {
+        'pnl': float(equity.iloc[-1] - initial_capital),
+        'total_return': float(equity.iloc[-1] / initial_capital - 1),
+        'max_drawdown': float(drawdown.min()),
+        'hit_rate': float((closed['return'] > 0).mean()) if len(closed) else 0.0,
+        'num_trades': int(len(trades)),
+        'equity': equity,
+        'drawdown': drawdown,
+        'trades': trades,
+    }
+
+def _position_equity(closes: np.ndarray, exec_price: np.ndarray, new_pos: np.ndarray, delta: np.ndarray,
+                     commission: float, initial_capital: float) -> np.ndarray:
+    """
+    Mark-to-market equity at each close, one segment per position change
+    """
+    changes = np.flatnonzero(delta != 0)
+    if len(changes) == 0:
+        return np.full(len(closes), initial_capital)
+
+    sides = new_pos[changes]
+    entry_price = exec_price[changes]
+    # Growth of each segment's position up to the fill that ends it (the last is still open)
+    exit_price = exec_price[np.append(changes[1:], changes[-1])]
+    segment_growth = 1 + sides * (exit_price / entry_price - 1)
+    # Capital at the start of each segment, after that change's commission
+    base = (initial_capital * np.cumprod(1 - commission * np.abs(delta[changes])) *
+            np.concatenate(([1.0], np.cumprod(segment_growth[:-1]))))
+
+    segment = np.searchsorted(changes, np.arange(len(closes)), side='right') - 1
+    held = segment >= 0
+    k = segment[held]
+    equity = np.full(len(closes), initial_capital)
+    equity[held] = base[k] * (1 + sides[k] * (closes[held] / entry_price[k] - 1))
+    return equity
+
+def _extract_trades(index, closes: np.ndarray, exec_price: np.ndarray, new_pos: np.ndarray,
+                    delta: np.ndarray, commission: float) -> pd.DataFrame:
+    """
+    Build the trade list from position change points without a per-trade loop
+    """
+    changes = np.flatnonzero(delta != 0)
+    if len(changes) == 0:
+        return pd.DataFrame(columns=TRADE_COLUMNS)
+
+    entries = changes
+    exits = np.append(changes[1:], len(closes) - 1)
+    sides = new_pos[entries]
+    keep = sides != 0
+    entries, exits, sides = entries[keep], exits[keep], sides[keep]
+
+    closed = np.ones(len(entries), dtype=bool)
+    if len(entries) and entries[-1] == changes[-1]:
+        closed[-1] = False
+
+    entry_price = exec_price[entries]
+    exit_price = np.where(closed, exec_price[exits], closes[exits])
+    gross = np.where(sides > 0, exit_price / entry_price - 1, 1 - exit_price / entry_price)
+    cost = commission * np.where(closed, 2, 1)
+
+    return pd.DataFrame({
+        'side': np.where(sides > 0, 'LONG', 'SHORT'),
+        'entry_time': index[entries],
+        'exit_time': index[exits],
+        'entry_price': entry_price,
+        'exit_price': exit_price,
+        'bars_held': exits - entries,
+        'return': gross - cost,
+        'closed': closed,
+    }, columns=TRADE_COLUMNS)
+
+def run_backtest(symbol: str, period: str = "5d", interval: str = "30m", length: int = 5,
+                 percent: float = 1.5, slippage: float = 0.0, commission: float = 0.0,
+                 allow_short: bool = False) -> Optional[dict]:
+    """Fetch a symbol, compute OTT and backtest its signals"""
+    data = get_stock_data(symbol, period=period, interval=interval)
+    if data is None:
+        return None
+    MAvg, OTT, _ = calculate_ott(data, length, percent)
+    return backtest_signals(data, MAvg, OTT, slippage, commission, allow_short)
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest OTT crossover signals")
+    parser.add_argument('symbol')
+    parser.add_argument('--period', default='5d')
+    parser.add_argument('--interval', default='30m')
+    parser.add_argument('--length', type=int, default=5)
+    parser.add_argument('--percent', type=float, default=1.5)
+    parser.add_argument('--slippage', type=float, default=0.0)
+    parser.add_argument('--commission', type=float, default=0.0)
+    parser.add_argument('--short', action='store_true', help="Go short on sell signals")
+    args = parser.parse_args()
+
+    result = run_backtest(args.symbol, args.period, args.interval, args.length, args.percent,
+                          args.slippage, args.commission, args.short)
+    if result is None:
+        logger.error(f"No data for {args.symbol}")
+        return
+
+    print(f"Symbol:       {args.symbol}")
+    print(f"PnL:          {result['pnl']:.2f}")
+    print(f"Total return: {result['total_return']:.2%}")
+    print(f"Max drawdown: {result['max_drawdown']:.2%}")
+    print(f"Hit rate:     {result['hit_rate']:.2%}")
+    print(f"Trades:       {result['num_trades']}")
+    if result['num_trades']:
+        print(result['trades'].to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3.10
+import argparse
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Keep benchmark alerts out of the real alert log
+os.environ.setdefault('OTT_ALERT_DB', ':memory:')
+import server
+
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+DEFAULT_SYMBOL_COUNTS = [1, 100, 1000]
+ENDPOINTS = ['/api/status', '/api/alerts', '/api/signals', '/api/chart/^NSEI']
+
+def _time_call(fn, repeat: int) -> dict:
+    """Run fn once to warm up (JIT, caches), then time repeat calls"""
+    fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return {
+        'min_s': min(samples),
+        'median_s': statistics.median(samples),
+        'mean_s': statistics.fmean(samples),
+        'repeat': repeat,
+    }
+
+def bench_indicators(sizes: list, repeat: int) -> list:
+    """Time each indicator stage on one synthetic series per size"""
+    results = []
+    for size in sizes:
+        data = server.generate_random_walk('BENCH', bars=size, interval='1m')
+        close = data['Close']
+        MAvg, OTT, _ = server.calculate_ott(data)
+        state_bars = close.to_numpy()[:min(size, 100_000)]
+        stages = {
+            'calculate_var_function': lambda: server.calculate_var_function(close),
+            'calculate_ott': lambda: server.calculate_ott(data),
+            'detect_signals': lambda: server.detect_signals(MAvg, OTT),
+            'ott_state_update_many': lambda: server.OTTState().update_many(state_bars),
+        }
+        runs = repeat if size < 1_000_000 else max(1, repeat // 3)
+        for stage, fn in stages.items():
+            timing = _time_call(fn, runs)
+            bars = len(state_bars) if stage == 'ott_state_update_many' else size
+            timing.update({'stage': stage, 'bars': bars, 'bars_per_s': bars / timing['median_s']})
+            results.append(timing)
+            print(f"{stage:<24} {bars:>9} bars  {timing['median_s'] * 1000:10.2f} ms")
+    return results
+
+def bench_symbols(symbol_counts: list, bars: int, repeat: int) -> list:
+    """Time per-symbol calculate_ott against calculate_ott_matrix over many symbols"""
+    results = []
+    for count in symbol_counts:
+        frames = {f"SYM{i}": server.generate_random_walk(f"SYM{i}", bars=bars) for i in range(count)}
+        matrix = server.build_close_matrix(frames).to_numpy()
+        stages = {
+            'calculate_ott_per_symbol': lambda: [server.calculate_ott(frame) for frame in frames.values()],
+            'calculate_ott_matrix': lambda: server.calculate_ott_matrix(matrix),
+        }
+        for stage, fn in stages.items():
+            timing = _time_call(fn, repeat)
+            timing.update({'stage': stage, 'symbols': count, 'bars': bars,
+                           'symbols_per_s': count / timing['median_s']})
+            results.append(timing)
+            print(f"{stage:<24} {count:>5} symbols  {timing['median_s'] * 1000:10.2f} ms")
+    return results
+
+def bench_endpoints(requests_per_endpoint: int, concurrency: int) -> list:
+    """Load-test the Flask routes in-process against a synthetic data source"""
+    server.data_source = server.SyntheticSource(bars=2000)
+    server.bar_cache = None
+    for i in range(50):
+        server.add_alert_to_history(f"SYM{i}", "BUY" if i % 2 else "SELL", 100.0 + i)
+
+    results = []
+    for endpoint in ENDPOINTS:
+        server.indicator_cache.clear()
+        latencies = []
+        errors = []
+        lock = threading.Lock()
+        per_worker = max(1, requests_per_endpoint // concurrency)
+
+        def worker():
+            client = server.app.test_client()
+            local = []
+            failed = 0
+            for _ in range(per_worker):
+                start = time.perf_counter()
+                response = client.get(endpoint)
+                local.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    failed += 1
+            with lock:
+                latencies.extend(local)
+                errors.append(failed)
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        latencies_ms = np.array(latencies) * 1000
+        result = {
+            'endpoint': endpoint,
+            'requests': len(latencies),
+            'concurrency': concurrency,
+            'errors': sum(errors),
+            'requests_per_s': len(latencies) / elapsed,
+            'p50_ms': float(np.percentile(latencies_ms, 50)),
+            'p95_ms': float(np.percentile(latencies_ms, 95)),
+            'p99_ms': float(np.percentile(latencies_ms, 99)),
+        }
+        results.append(result)
+        print(f"{endpoint:<24} {result['requests_per_s']:10.1f} req/s  p50 {result['p50_ms']:.2f} ms  "
+              f"p99 {result['p99_ms']:.2f} ms")
+    return results
+
+def bench_shards(symbol_count: int, shard_counts: list, repeat: int) -> list:
+    """Time full scans of a synthetic universe in-process and on ShardedScanner pools"""
+    # Shard workers are spawned and build their data source from the environment
+    os.environ['OTT_DATA_SOURCE'] = 'synthetic'
+    server.data_source = server.SyntheticSource()
+    symbols = [f"SYM{i}" for i in range(symbol_count)]
+    timeframes = ['30m', '1h']
+    results = []
+    runs = {'in_process': None}
+    runs.update({f"shards_{count}": count for count in shard_counts})
+    for stage, shards in runs.items():
+        scanner = None
+        if shards:
+            scanner = server.ShardedScanner(shards)
+            scanner.start()
+        scan = scanner.scan if scanner is not None else server.evaluate_symbols
+
+        def fn(scan=scan):
+            # A failed shard is logged and its symbols left out, which would look like a fast scan
+            results = scan(symbols, '5d', '30m', 5, 1.5, timeframes)
+            scanned = {result['symbol'] for result in results if result['status'] == 'ok'}
+            if len(scanned) < symbol_count:
+                raise RuntimeError(f"only {len(scanned)} of {symbol_count} symbols scanned")
+
+        try:
+            timing = _time_call(fn, repeat)
+        except RuntimeError as e:
+            results.append({'stage': stage, 'symbols': symbol_count, 'shards': shards or 0, 'error': str(e)})
+            print(f"{stage:<24} {symbol_count:>5} symbols  FAILED: {e}")
+            continue
+        finally:
+            if scanner is not None:
+                scanner.stop()
+        timing.update({'stage': stage, 'symbols': symbol_count, 'shards': shards or 0,
+                       'symbols_per_s': symbol_count / timing['median_s']})
+        results.append(timing)
+        print(f"{stage:<24} {symbol_count:>5} symbols  {timing['median_s'] * 1000:10.2f} ms")
+    return results
+
+def bench_cold_start(runs: int, timeout: float = 30.0) -> dict:
+    """
+    Time from spawning server.py until GET / first succeeds (time-to-first-response)
+    """
+    server_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'server.py')
+    # No scanner: a benchmark run must not send real alert emails
+    env = dict(os.environ, OTT_DATA_SOURCE='synthetic', OTT_ALERT_DB=':memory:', OTT_SCANNER='0')
+    samples = []
+    for _ in range(runs):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        url = f"http://127.0.0.1:{port}/"
+        started = time.perf_counter()
+        process = subprocess.Popen([sys.executable, server_path, '--host', '127.0.0.1', '--port', str(port)],
+                                   env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            while time.perf_counter() - started < timeout:
+                try:
+                    with urllib.request.urlopen(url, timeout=1) as response:
+                        response.read()
+                    samples.append(time.perf_counter() - started)
+                    break
+                except OSError:
+                    time.sleep(0.005)
+        finally:
+            process.terminate()
+            process.wait(timeout=10)
+
+    result = {
+        'runs': runs,
+        'completed': len(samples),
+        'min_ms': min(samples) * 1000 if samples else None,
+        'median_ms': statistics.median(samples) * 1000 if samples else None,
+    }
+    print(f"{'time_to_first_response':<24} {runs:>5} runs  {result['median_ms'] or float('nan'):10.2f} ms")
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the OTT indicator pipeline and HTTP endpoints")
+    parser.add_argument('--output', default='bench_results.json', help="JSON file to write results to")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--symbols', type=int, nargs='+', default=DEFAULT_SYMBOL_COUNTS)
+    parser.add_argument('--symbol-bars', type=int, default=1000, help="Bars per symbol in the multi-symbol run")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--requests', type=int, default=200, help="Requests per endpoint")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--shard-symbols', type=int, default=1000, help="Universe size for the sharded scan")
+    parser.add_argument('--shards', type=int, nargs='+', default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument('--cold-starts', type=int, default=5, help="Server restarts to time")
+    parser.add_argument('--quick', action='store_true', help="Small sizes for a fast smoke run")
+    args = parser.parse_args()
+
+    if args.quick:
+        args.sizes, args.symbols, args.repeat, args.requests, args.cold_starts = [1_000, 10_000], [1, 10], 2, 40, 2
+        args.shard_symbols, args.shards = 50, [1, 2]
+
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'numba': server.NUMBA_AVAILABLE,
+        'indicators': bench_indicators(args.sizes, args.repeat),
+        'symbols': bench_symbols(args.symbols, args.symbol_bars, args.repeat),
+        'endpoints': bench_endpoints(args.requests, args.concurrency),
+        'shards': bench_shards(args.shard_symbols, sorted(set(args.shards)), args.repeat),
+        'cold_start': bench_cold_start(args.cold_starts),
+    }
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,106 @@
 #!/usr/bin/env python3.10
-import yfinance as yf
-import pandas as pd
-import numpy as np
+from __future__ import annotations
+import time
+STARTED_AT = time.perf_counter()
 import smtplib
+import queue
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-import time
 from datetime import datetime, timedelta
 import logging
 from typing import Tuple, Optional
 import warnings
 import threading
 import json
-from flask import Flask, render_template_string, jsonify, request
-import plotly.graph_objs as go
-import plotly.utils
+import gzip
+import argparse
+import functools
+import hashlib
+import importlib
+import importlib.util
+import sqlite3
+import tempfile
+import bisect
+import zlib
+import os
+import sys
+import copy
+import math
+from abc import ABC, abstractmethod
+import mmap
+import multiprocessing
+from collections import deque, OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from flask import Flask, Response, jsonify, request
+
+class _DeferredModule:
+    """
+    Stand-in for a module global that imports the module on first attribute
+    access and then rebinds the global to the real module. The import goes
+    through the regular (thread-safe) import system, so threads racing on the
+    first access all get a fully initialised module.
+    """
+    
+    def __init__(self, name: str, alias: str):
+        self.name = name
+        self.alias = alias
+    
+    def load(self):
+        module = importlib.import_module(self.name)
+        globals()[self.alias] = module
+        return module
+    
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+def _lazy_import(name: str, alias: str):
+    """
+    Return module name, deferring its actual import to first use.
+    numpy, pandas and yfinance make up most of the start-up time and the
+    dashboard can answer requests before any of them is needed.
+    Set OTT_LAZY_IMPORTS=0 to import eagerly.
+    """
+    if name in sys.modules or os.environ.get('OTT_LAZY_IMPORTS', '1') == '0':
+        return importlib.import_module(name)
+    if importlib.util.find_spec(name) is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    return _DeferredModule(name, alias)
+
+def load_deferred_modules():
+    """Import every module _lazy_import deferred (numba resolves globals at compile time)"""
+    for value in list(globals().values()):
+        if isinstance(value, _DeferredModule):
+            value.load()
+
+np = _lazy_import('numpy', 'np')
+pd = _lazy_import('pandas', 'pd')
+yf = _lazy_import('yfinance', 'yf')
+
+NUMBA_AVAILABLE = importlib.util.find_spec('numba') is not None
+
+def _lazy_njit(**options):
+    """
+    numba.njit applied on a kernel's first call, so numba is imported only
+    once a kernel runs. Falls back to the plain function if numba is broken.
+    """
+    def decorate(func):
+        compiled = None
+        
+        @functools.wraps(func)
+        def wrapper(*args):
+            nonlocal compiled
+            if compiled is None:
+                try:
+                    from numba import njit
+                    load_deferred_modules()
+                    compiled = njit(**options)(func)
+                except ImportError as e:
+                    logger.warning(f"Numba unavailable, running {func.__name__} uncompiled: {str(e)}")
+                    compiled = func
+            return compiled(*args)
+        return wrapper
+    return decorate
 
 warnings.filterwarnings('ignore')
 
@@ -30,9 +116,9 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Global variables for dashboard
-alerts_history = []
 system_status = {'running': False, 'last_scan': None, 'alerts_today': 0}
-current_data = {}
+ott_states = {}
+resamplers = {}
 
 # Flask App
 app = Flask(__name__)
@@ -306,12 +392,117 @@ DASHBOARD_HTML = """
     </div>
 
     <script>
-        // Auto-refresh data every 30 seconds
-        setInterval(refreshDashboard, 30000);
-        
-        // Initial load
+        let alerts = [];
+        let status = {};
+        let chartSymbol = null;
+        let chartData = null;
+        let streamConnected = false;
+        let pollTimer = null;
+        
+        // Initial load, then live updates pushed over Server-Sent Events
         refreshDashboard();
         updateChart();
+        connectStream();
+        
+        function startPolling() {
+            if (!pollTimer) {
+                pollTimer = setInterval(() => { refreshDashboard(); refreshChart(); }, 30000);
+            }
+        }
+        
+        function connectStream() {
+            if (!window.EventSource) {
+                // No SSE support: fall back to polling every 30 seconds
+                startPolling();
+                return;
+            }
+            
+            const source = new EventSource('/api/stream');
+            source.onopen = () => {
+                // EventSource reconnects on its own; resync anything missed while down
+                if (streamConnected) {
+                    refreshDashboard();
+                    refreshChart();
+                }
+                streamConnected = true;
+                clearInterval(pollTimer);
+                pollTimer = null;
+            };
+            source.onerror = () => {
+                // Closed rather than reconnecting: the server refused the stream (503 when
+                // its streaming slots are full), so poll and try streaming again later
+                if (source.readyState === EventSource.CLOSED) {
+                    startPolling();
+                    setTimeout(connectStream, 300000);
+                }
+            };
+            source.addEventListener('status', event => {
+                Object.assign(status, JSON.parse(event.data));
+                updateSystemStatus(status);
+            });
+            source.addEventListener('alert', event => {
+                alerts.unshift(JSON.parse(event.data));
+                alerts = alerts.slice(0, 100);
+                displayAlerts(alerts);
+                displaySignals(recentSignals(alerts));
+            });
+            source.addEventListener('clear', () => {
+                alerts = [];
+                displayAlerts(alerts);
+                displaySignals([]);
+            });
+            source.addEventListener('bar', event => applyBar(JSON.parse(event.data)));
+        }
+        
+        function recentSignals(list) {
+            const cutoff = Date.now() - 24 * 60 * 60 * 1000;
+            return list.filter(a => new Date(a.timestamp.replace(' ', 'T')).getTime() > cutoff).slice(0, 20);
+        }
+        
+        function applyBar(bar) {
+            // Bars are published for every scanned timeframe; the forming bars of
+            // several timeframes can share a timestamp
+            if (!chartData || bar.symbol !== chartSymbol || bar.interval !== chartData.interval) {
+                return;
+            }
+            const last = chartData.timestamps.length - 1;
+            if (chartData.timestamps[last] === bar.timestamp) {
+                // The forming bar moved: patch the last point of the drawn traces
+                // (extendTraces replaces their arrays, so chartData's are not them)
+                const traces = document.getElementById('price-chart').data;
+                chartData.prices[last] = traces[0].y[traces[0].y.length - 1] = bar.price;
+                chartData.ott[last] = traces[1].y[traces[1].y.length - 1] = bar.ott;
+                Plotly.redraw('price-chart');
+            } else if (bar.timestamp > chartData.timestamps[last]) {
+                chartData.timestamps.push(bar.timestamp);
+                chartData.prices.push(bar.price);
+                chartData.ott.push(bar.ott);
+                Plotly.extendTraces('price-chart', {
+                    x: [[bar.timestamp * 1000], [bar.timestamp * 1000]],
+                    y: [[bar.price], [bar.ott]]
+                }, [0, 1]);
+            }
+        }
+        
+        function refreshChart() {
+            // Fetch only bars from the last one we have onward (it may have changed)
+            if (!chartData) {
+                return;
+            }
+            const symbol = chartSymbol;
+            const since = chartData.timestamps[chartData.timestamps.length - 1];
+            fetch(`/api/chart/${encodeURIComponent(symbol)}?since=${since}`, { cache: 'no-cache' })
+                .then(response => response.json())
+                .then(data => {
+                    if (data.error || symbol !== chartSymbol) {
+                        return;
+                    }
+                    data.timestamps.forEach((t, i) => applyBar({
+                        symbol: symbol, interval: data.interval, timestamp: t, price: data.prices[i], ott: data.ott[i]
+                    }));
+                })
+                .catch(error => console.error('Error:', error));
+        }
         
         function refreshDashboard() {
             fetch('/api/status')
@@ -339,6 +530,7 @@ DASHBOARD_HTML = """
                 statusText.textContent = 'Offline ❌';
             }
             
+            status = Object.assign({}, data);
             lastScan.textContent = data.last_scan || 'Never';
             alertsToday.textContent = data.alerts_today || '0';
         }
@@ -347,6 +539,7 @@ DASHBOARD_HTML = """
             fetch('/api/alerts')
                 .then(response => response.json())
                 .then(data => {
+                    alerts = data;
                     displayAlerts(data);
                 })
                 .catch(error => console.error('Error:', error));
@@ -387,7 +580,7 @@ DASHBOARD_HTML = """
                 html += `
                     <tr class="${signalClass}">
                         <td>${alert.timestamp}</td>
-                        <td>${alert.symbol}</td>
+                        <td>${alert.symbol}${alert.interval ? ` <small>(${alert.interval})</small>` : ''}</td>
                         <td>${alert.signal}</td>
                         <td>₹${alert.price.toFixed(2)}</td>
                     </tr>
@@ -411,7 +604,7 @@ DASHBOARD_HTML = """
                 const signalClass = signal.signal === 'BUY' ? 'buy-signal' : 'sell-signal';
                 html += `
                     <div style="padding: 8px; margin: 5px 0; border-radius: 5px;" class="${signalClass}">
-                        <strong>${signal.symbol}</strong> - ${signal.signal} at ₹${signal.price.toFixed(2)}
+                        <strong>${signal.symbol}</strong>${signal.interval ? ` (${signal.interval})` : ''} - ${signal.signal} at ₹${signal.price.toFixed(2)}
                         <br><small>${signal.timestamp}</small>
                     </div>
                 `;
@@ -422,8 +615,10 @@ DASHBOARD_HTML = """
         
         function updateChart() {
             const symbol = document.getElementById('symbol-select').value;
+            // Roughly one point per horizontal pixel is all the chart can show
+            const maxPoints = Math.max(200, document.getElementById('price-chart').clientWidth);
             
-            fetch(`/api/chart/${symbol}`)
+            fetch(`/api/chart/${encodeURIComponent(symbol)}?max_points=${maxPoints}`, { cache: 'no-cache' })
                 .then(response => response.json())
                 .then(data => {
                     if (data.error) {
@@ -432,8 +627,12 @@ DASHBOARD_HTML = """
                         return;
                     }
                     
+                    chartSymbol = symbol;
+                    chartData = data;
+                    
+                    const times = data.timestamps.map(t => t * 1000);
                     const trace1 = {
-                        x: data.timestamps,
+                        x: times,
                         y: data.prices,
                         type: 'scatter',
                         mode: 'lines',
@@ -442,7 +641,7 @@ DASHBOARD_HTML = """
                     };
                     
                     const trace2 = {
-                        x: data.timestamps,
+                        x: times.slice(),
                         y: data.ott,
                         type: 'scatter',
                         mode: 'lines',
@@ -451,9 +650,9 @@ DASHBOARD_HTML = """
                     };
                     
                     const layout = {
-                        title: `${symbol} - OTT Analysis`,
-                        xaxis: { title: 'Time' },
-                        yaxis: { title: 'Price' },
+                        title: { text: `${symbol} - OTT Analysis` },
+                        xaxis: { title: { text: 'Time' }, type: 'date' },
+                        yaxis: { title: { text: 'Price' } },
                         hovermode: 'x unified',
                         height: 350
                     };
@@ -490,130 +689,795 @@ def load_config(config_file='config.json') -> dict:
         logger.error(f"Failed to load config: {str(e)}")
         raise
 
-def get_stock_data(symbol: str, period: str = "5d", interval: str = "30m") -> Optional[pd.DataFrame]:
+def _validate_stock_data(symbol: str, data: Optional[pd.DataFrame]) -> Optional[pd.DataFrame]:
+    """Apply the empty / minimum-length checks shared by all fetch paths"""
+    if data is None or data.empty:
+        logger.warning(f"No data found for symbol: {symbol}")
+        return None
+        
+    if len(data) < 20:
+        logger.warning(f"Insufficient data for {symbol}: {len(data)} points")
+        return None
+        
+    return data.dropna()
+
+def _period_to_timedelta(period: str) -> Optional[timedelta]:
+    """Convert a yfinance period string ("5d", "1mo", "1y") to a calendar span"""
+    units = {'d': 1, 'wk': 7, 'mo': 31, 'y': 366}
+    for suffix, days in units.items():
+        if period.endswith(suffix) and period[:-len(suffix)].isdigit():
+            return timedelta(days=int(period[:-len(suffix)]) * days)
+    return None
+
+def _slice_period(data: pd.DataFrame, period: str) -> pd.DataFrame:
+    """Trim cached bars to the window yfinance would return for period"""
+    if data.empty or period in ('max', 'ytd'):
+        return data
+    if period.endswith('d') and period[:-1].isdigit():
+        # "Nd" means the last N trading sessions, not calendar days
+        dates = data.index.normalize()
+        keep = dates.unique()[-int(period[:-1]):]
+        return data[dates.isin(keep)]
+    span = _period_to_timedelta(period)
+    if span is None:
+        return data
+    return data[data.index > data.index[-1] - span]
+
+class BarCache:
     """
-    Fetch stock data from Yahoo Finance with error handling
+    On-disk OHLCV store, one file per (symbol, interval).
+    Fetches only request bars from the last cached timestamp onward and merge them in;
+    rows older than max_age_days (or the longest period requested, if longer) are trimmed
+    and files are evicted LRU past max_bytes.
     """
-    try:
-        ticker = yf.Ticker(symbol)
-        data = ticker.history(period=period, interval=interval)
-        
-        if data.empty:
-            logger.warning(f"No data found for symbol: {symbol}")
+    
+    def __init__(self, cache_dir: str = 'bar_cache', max_bytes: int = 512 * 1024 * 1024,
+                 max_age_days: int = 60):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age = timedelta(days=max_age_days)
+        self.locks = {}
+        self.locks_lock = threading.Lock()
+        self.extension = 'parquet' if importlib.util.find_spec('pyarrow') else 'pkl'
+    
+    def _path(self, symbol: str, interval: str) -> str:
+        safe_symbol = ''.join(c if c.isalnum() or c in '-_.' else '_' for c in symbol)
+        return os.path.join(self.cache_dir, f"{safe_symbol}_{interval}.{self.extension}")
+    
+    def _lock(self, path: str) -> threading.Lock:
+        with self.locks_lock:
+            return self.locks.setdefault(path, threading.Lock())
+    
+    def load(self, symbol: str, interval: str) -> Optional[pd.DataFrame]:
+        path = self._path(symbol, interval)
+        if not os.path.exists(path):
             return None
-            
-        if len(data) < 20:
-            logger.warning(f"Insufficient data for {symbol}: {len(data)} points")
+        try:
+            if self.extension == 'parquet':
+                data = pd.read_parquet(path)
+            else:
+                data = pd.read_pickle(path)
+            os.utime(path)
+            return data
+        except Exception as e:
+            logger.warning(f"Discarding unreadable cache file {path}: {str(e)}")
+            os.remove(path)
             return None
+    
+    def store(self, symbol: str, interval: str, data: pd.DataFrame, keep: Optional[timedelta] = None):
+        """Write bars, keeping at least the last max_age_days (or keep, if longer)"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(symbol, interval)
+        if not data.empty:
+            data = data[data.index >= data.index[-1] - max(self.max_age, keep or self.max_age)]
+        # A unique temp file per writer, so processes sharing the cache never clobber each other
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                if self.extension == 'parquet':
+                    data.to_parquet(f)
+                else:
+                    data.to_pickle(f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        self.evict()
+    
+    def evict(self):
+        """Remove least recently used files until the cache fits in max_bytes"""
+        try:
+            entries = [entry for entry in os.scandir(self.cache_dir)
+                       if entry.is_file() and not entry.name.endswith('.tmp')]
+        except FileNotFoundError:
+            return
+        total = sum(entry.stat().st_size for entry in entries)
+        for entry in sorted(entries, key=lambda e: e.stat().st_mtime):
+            if total <= self.max_bytes:
+                break
+            total -= entry.stat().st_size
+            os.remove(entry.path)
+    
+    def fetch(self, symbol: str, period: str, interval: str, download) -> pd.DataFrame:
+        """
+        Return bars for period, topping up the cache via download(period=...) or download(start=...)
+        """
+        path = self._path(symbol, interval)
+        with self._lock(path):
+            cached = self.load(symbol, interval)
+            span = _period_to_timedelta(period)
+            if cached is None or cached.empty or span is None:
+                needs_full = True
+            else:
+                window_start = pd.Timestamp.now(tz=cached.index.tz) - span
+                # Periods are rounded up to whole months/years and the first session can follow
+                # a weekend or holiday, so allow a few days of slack before refetching everything
+                needs_full = (cached.index[0] > window_start + timedelta(days=5) or
+                              cached.index[-1] < window_start)
             
-        data = data.dropna()
-        return data
+            if needs_full:
+                fresh = download(period=period)
+            else:
+                # The last cached bar may have been partial, so refetch from it inclusive
+                fresh = download(start=cached.index[-1])
+            
+            if fresh is None or fresh.empty:
+                data = cached
+            elif cached is None or cached.empty:
+                data = fresh
+            else:
+                data = pd.concat([cached, fresh])
+                data = data[~data.index.duplicated(keep='last')].sort_index()
+            
+            if data is None or data.empty:
+                return data
+            if fresh is not None and not fresh.empty:
+                # Keep whatever the longest period needs ("max"/"ytd" keep everything), so a
+                # short top-up doesn't shed history a longer period already downloaded
+                keep = span if span is not None else data.index[-1] - data.index[0]
+                if cached is not None and not cached.empty:
+                    keep = max(keep, cached.index[-1] - cached.index[0])
+                self.store(symbol, interval, data, keep=keep)
+            return _slice_period(data, period)
+
+bar_cache = BarCache()
+
+def _interval_seconds(interval: str) -> int:
+    """Length of a yfinance interval string ("30m", "1h", "1d") in seconds"""
+    units = {'m': 60, 'h': 3600, 'd': 86400, 'wk': 7 * 86400, 'mo': 30 * 86400}
+    for suffix in ('wk', 'mo', 'm', 'h', 'd'):
+        if interval.endswith(suffix) and interval[:-len(suffix)].isdigit():
+            return int(interval[:-len(suffix)]) * units[suffix]
+    raise ValueError(f"Unsupported interval: {interval}")
+
+class _Flight:
+    """A computation in progress that concurrent callers wait on"""
+    __slots__ = ('event', 'value', 'error')
+    
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+class IndicatorCache:
+    """
+    Thread-safe LRU cache of fetched frames and indicator results.
+    Keys are (symbol, interval, period, length, percent); frames use None for length/percent.
+    Concurrent misses on one key run a single computation (single-flight).
+    """
+    
+    def __init__(self, max_entries: int = 512, max_ttl: float = 300):
+        self.max_entries = max_entries
+        self.max_ttl = max_ttl
+        self.entries = OrderedDict()
+        self.inflight = {}
+        self.lock = threading.Lock()
+    
+    def bar_expiry(self, data: Optional[BarBuffer], interval: str) -> float:
+        """Expire when the next bar is due, but never later than max_ttl from now"""
+        now = time.time()
+        if data is None or not len(data):
+            return now + self.max_ttl
+        next_bar = data.last_timestamp + _interval_seconds(interval)
+        return min(next_bar, now + self.max_ttl) if next_bar > now else now + self.max_ttl
+    
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+    
+    def put(self, key, value, expires_at: float):
+        with self.lock:
+            self.entries[key] = (expires_at, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+    
+    def invalidate(self, symbol: str, interval: str, period: str):
+        """Drop the frame and every indicator result derived from it"""
+        with self.lock:
+            for key in [k for k in self.entries if k[:3] == (symbol, interval, period)]:
+                del self.entries[key]
+    
+    def get_or_compute(self, key, compute, expires_at):
+        """
+        Return the cached value for key, or run compute() once across all waiting threads.
+        expires_at(value) gives the epoch time the new entry expires; None results are not cached.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+        
+        with self.lock:
+            flight = self.inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.inflight[key] = _Flight()
+        
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        
+        try:
+            flight.value = compute()
+            if flight.value is not None:
+                self.put(key, flight.value, expires_at(flight.value))
+            return flight.value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.inflight[key]
+            flight.event.set()
+    
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+indicator_cache = IndicatorCache()
+
+def get_cached_stock_data(symbol: str, period: str = "5d", interval: str = "30m") -> Optional[BarBuffer]:
+    """get_stock_data through the shared in-memory cache, held as a compact BarBuffer"""
+    def compute():
+        data = get_stock_data(symbol, period=period, interval=interval)
+        if data is None or data.empty:
+            return None
+        return BarBuffer.from_frame(data, capacity=len(data))
+    
+    return indicator_cache.get_or_compute(
+        (symbol, interval, period, None, None), compute,
+        lambda data: indicator_cache.bar_expiry(data, interval))
+
+def store_cached_stock_data(symbol: str, data: BarBuffer, period: str = "5d", interval: str = "30m"):
+    """Publish a snapshot (BarBuffer.copy()) of freshly scanned bars and drop stale indicator results"""
+    indicator_cache.invalidate(symbol, interval, period)
+    indicator_cache.put((symbol, interval, period, None, None), data, indicator_cache.bar_expiry(data, interval))
+
+def get_cached_ott(symbol: str, period: str = "5d", interval: str = "30m", length: int = 5,
+                   percent: float = 1.5) -> Optional[Tuple[BarBuffer, np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Return (bars, MAvg, OTT, direction) arrays for a symbol, computed at most once per bar
+    """
+    def compute():
+        bars = get_cached_stock_data(symbol, period, interval)
+        if bars is None or len(bars) < length:
+            return None
+        MAvg, OTT, direction = calculate_ott_arrays(bars.closes, length, percent)
+        return bars, MAvg, OTT, direction
+    
+    return indicator_cache.get_or_compute(
+        (symbol, interval, period, length, percent), compute,
+        lambda result: indicator_cache.bar_expiry(result[0], interval))
+
+class DataSource(ABC):
+    """
+    Market data provider used by the scanner and chart API.
+    history() follows yf.Ticker.history: pass either period= or start=.
+    """
+    
+    # Cached on disk by BarCache; replay and synthetic data are not
+    cacheable = False
+    # Requests go through fetch_rate_limiter; local sources need no throttling
+    rate_limited = False
+    # Simulated seconds per wall-clock second; None for a static source
+    speed = None
+    # time.monotonic() at which the simulated clock started
+    wall_start = None
+    
+    @abstractmethod
+    def history(self, symbol: str, interval: str = "30m", period: Optional[str] = None,
+                start=None, timeout: Optional[float] = None, raise_errors: bool = False) -> pd.DataFrame:
+        """OHLCV bars of interval for symbol over period, or from start onward"""
+    
+    def start_clock(self, wall_start: Optional[float] = None):
+        """Start the simulated clock (at wall_start, to share another process's clock); no-op for live sources"""
+    
+    def time(self) -> float:
+        """Current (possibly simulated) epoch time in seconds"""
+        return time.time()
+    
+    def sleep(self, seconds: float):
+        """Sleep for seconds of simulated time"""
+        time.sleep(seconds / self.speed if self.speed else seconds)
+
+class YFinanceSource(DataSource):
+    """Live Yahoo Finance data"""
+    
+    cacheable = True
+    rate_limited = True
+    
+    def history(self, symbol: str, interval: str = "30m", period: Optional[str] = None,
+                start=None, timeout: Optional[float] = None, raise_errors: bool = False) -> pd.DataFrame:
+        kwargs = {'interval': interval}
+        if start is not None:
+            kwargs['start'] = start
+        else:
+            kwargs['period'] = period
+        if timeout is not None:
+            kwargs['timeout'] = timeout
+        if raise_errors:
+            kwargs['raise_errors'] = True
+        return yf.Ticker(symbol).history(**kwargs)
+
+class ReplaySource(DataSource):
+    """
+    Replays recorded bars from <directory>/<symbol>.csv or .parquet on a simulated clock.
+    With speed=100 a 6h15m session replays in under 4 minutes; bars only become visible
+    once the simulated clock passes their timestamp. speed=None exposes every bar at once.
+    The clock stands at the first bar until start_clock() is called.
+    """
+    
+    def __init__(self, directory: str, speed: Optional[float] = 100.0, start=None):
+        self.directory = directory
+        self.speed = speed
+        self.start = pd.Timestamp(start) if start is not None else None
+        self.wall_start = None
+        self.frames = {}
+        self.lock = threading.Lock()
+    
+    def _load(self, symbol: str) -> pd.DataFrame:
+        safe_symbol = ''.join(c if c.isalnum() or c in '-_.' else '_' for c in symbol)
+        for extension in ('parquet', 'csv'):
+            path = os.path.join(self.directory, f"{safe_symbol}.{extension}")
+            if os.path.exists(path):
+                if extension == 'parquet':
+                    return pd.read_parquet(path)
+                return pd.read_csv(path, index_col=0, parse_dates=[0])
+        raise FileNotFoundError(f"No replay data for {symbol} in {self.directory}")
+    
+    def frame(self, symbol: str, interval: str = "30m") -> pd.DataFrame:
+        key = self._frame_key(symbol, interval)
+        with self.lock:
+            if key not in self.frames:
+                data = self._load(*key).sort_index()
+                if self.start is None and not data.empty:
+                    self.start = data.index[0]
+                self.frames[key] = data
+            return self.frames[key]
+    
+    def _frame_key(self, symbol: str, interval: str) -> tuple:
+        # Recordings are replayed at the resolution they were captured in
+        return (symbol,)
+    
+    def start_clock(self, wall_start: Optional[float] = None):
+        with self.lock:
+            if self.wall_start is None:
+                self.wall_start = wall_start if wall_start is not None else time.monotonic()
+    
+    def now(self, tz=None) -> Optional[pd.Timestamp]:
+        """Current simulated time, or None for a static source"""
+        if self.speed is None or self.start is None:
+            return None
+        elapsed = time.monotonic() - self.wall_start if self.wall_start is not None else 0.0
+        now = self.start + pd.Timedelta(seconds=elapsed * self.speed)
+        if tz is not None and now.tzinfo is None:
+            return now.tz_localize(tz)
+        if tz is None and now.tzinfo is not None:
+            return now.tz_localize(None)
+        return now
+    
+    def time(self) -> float:
+        now = self.now()
+        return now.timestamp() if now is not None else time.time()
+    
+    def history(self, symbol: str, interval: str = "30m", period: Optional[str] = None,
+                start=None, timeout: Optional[float] = None, raise_errors: bool = False) -> pd.DataFrame:
+        data = self.frame(symbol, interval)
+        now = self.now(data.index.tz)
+        if now is not None:
+            data = data[data.index <= now]
+        if start is not None:
+            start = pd.Timestamp(start)
+            if data.index.tz is not None and start.tzinfo is None:
+                start = start.tz_localize(data.index.tz)
+            return data[data.index >= start]
+        return _slice_period(data, period or "5d")
+
+class SyntheticSource(ReplaySource):
+    """
+    Deterministic geometric random walk per symbol and interval (seeded from the symbol name).
+    Each interval spans the same time as bars bars of the source interval, with volatility
+    scaled to the bar length.
+    Static by default; give speed to reveal bars on a simulated clock instead.
+    """
+    
+    def __init__(self, bars: int = 2000, interval: str = "30m", seed: int = 0,
+                 start: str = "2024-01-01 09:15", volatility: float = 0.002,
+                 speed: Optional[float] = None):
+        super().__init__(directory='', speed=speed, start=None)
+        self.bars = bars
+        self.interval = interval
+        self.seed = seed
+        self.origin = start
+        self.volatility = volatility
+        if speed is not None:
+            self.start = pd.Timestamp(start)
+    
+    def _frame_key(self, symbol: str, interval: str) -> tuple:
+        return (symbol, interval)
+    
+    def _load(self, symbol: str, interval: Optional[str] = None) -> pd.DataFrame:
+        interval = interval or self.interval
+        ratio = _interval_seconds(self.interval) / _interval_seconds(interval)
+        return generate_random_walk(symbol, max(1, int(self.bars * ratio)), interval, self.seed, self.origin,
+                                    self.volatility / math.sqrt(ratio))
+
+def generate_random_walk(symbol: str, bars: int = 2000, interval: str = "30m", seed: int = 0,
+                         start="2024-01-01 09:15", volatility: float = 0.002) -> pd.DataFrame:
+    """Build a reproducible OHLCV frame for symbol"""
+    rng = np.random.default_rng([seed, zlib.crc32(symbol.encode())])
+    close = 100 * np.exp(np.cumsum(rng.normal(0, volatility, bars)))
+    open_ = np.empty(bars)
+    open_[0] = close[0]
+    open_[1:] = close[:-1]
+    spread = np.abs(rng.normal(0, volatility, bars)) * close
+    index = pd.date_range(start=start, periods=bars, freq=pd.Timedelta(seconds=_interval_seconds(interval)))
+    return pd.DataFrame({
+        'Open': open_,
+        'High': np.maximum(open_, close) + spread,
+        'Low': np.minimum(open_, close) - spread,
+        'Close': close,
+        'Volume': rng.integers(1000, 100000, bars),
+    }, index=index)
+
+def create_data_source(spec: str) -> DataSource:
+    """
+    Build a source from "yfinance", "replay:<directory>[@speed]" or "synthetic[:bars]"
+    """
+    name, _, arg = spec.partition(':')
+    if name == 'yfinance':
+        return YFinanceSource()
+    if name == 'replay':
+        directory, _, speed = arg.partition('@')
+        return ReplaySource(directory, speed=float(speed) if speed else 100.0)
+    if name == 'synthetic':
+        return SyntheticSource(bars=int(arg) if arg else 2000)
+    raise ValueError(f"Unknown data source: {spec}")
+
+data_source = create_data_source(os.environ.get('OTT_DATA_SOURCE', 'yfinance'))
+
+def _fetch_bars(symbol: str, period: str, interval: str, **options) -> pd.DataFrame:
+    """Fetch through data_source, going via the on-disk cache when the source allows it"""
+    source = data_source
+    
+    def download(**window):
+        return source.history(symbol, interval=interval, **window, **options)
+    
+    if bar_cache and source.cacheable:
+        return bar_cache.fetch(symbol, period, interval, download)
+    return download(period=period)
+
+def get_stock_data(symbol: str, period: str = "5d", interval: str = "30m",
+                   timeout: Optional[float] = None) -> Optional[pd.DataFrame]:
+    """
+    Fetch stock data from the configured data source with error handling
+    """
+    try:
+        data = _fetch_bars(symbol, period, interval, timeout=timeout)
+        return _validate_stock_data(symbol, data)
     except Exception as e:
         logger.error(f"Error fetching data for {symbol}: {str(e)}")
         return None
 
-def calculate_var_function(src: pd.Series, length: int = 5) -> pd.Series:
+class TokenBucket:
+    """Thread-safe token bucket limiting upstream requests per second"""
+    
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Block until a token is available; False if timeout expires first"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+fetch_rate_limiter = TokenBucket(rate=4.0, capacity=8)
+
+def fetch_stock_data_with_retry(symbol: str, period: str = "5d", interval: str = "30m",
+                                retries: int = 3, backoff: float = 1.0, timeout: float = 20.0,
+                                limiter: Optional[TokenBucket] = None) -> Optional[pd.DataFrame]:
+    """
+    Fetch one symbol through the rate limiter, retrying failures with exponential backoff
+    """
+    limiter = limiter or fetch_rate_limiter
+    for attempt in range(retries + 1):
+        if data_source.rate_limited:
+            limiter.acquire()
+        start = time.perf_counter()
+        try:
+            data = _fetch_bars(symbol, period, interval, timeout=timeout, raise_errors=True)
+            metrics.observe('fetch_symbol_seconds', time.perf_counter() - start, symbol=symbol)
+            return _validate_stock_data(symbol, data)
+        except Exception as e:
+            metrics.inc('fetch_errors_total', symbol=symbol)
+            if attempt == retries:
+                logger.error(f"Error fetching data for {symbol} after {retries + 1} attempts: {str(e)}")
+                return None
+            metrics.inc('fetch_retries_total', symbol=symbol)
+            delay = backoff * (2 ** attempt)
+            logger.warning(f"Fetch failed for {symbol} ({str(e)}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+    return None
+
+def fetch_stock_data_many(symbols: list, period: str = "5d", interval: str = "30m",
+                          max_workers: int = 8, retries: int = 3, backoff: float = 1.0,
+                          timeout: float = 20.0, limiter: Optional[TokenBucket] = None) -> dict:
+    """
+    Fetch many symbols concurrently on a bounded thread pool; returns {symbol: DataFrame or None}
+    """
+    results = {}
+    if not symbols:
+        return results
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(symbols))) as executor:
+        futures = {
+            executor.submit(fetch_stock_data_with_retry, symbol, period, interval,
+                            retries, backoff, timeout, limiter): symbol
+            for symbol in symbols
+        }
+        pending = len(futures)
+        metrics.set_gauge('fetch_queue_depth', pending)
+        for future in as_completed(futures):
+            symbol = futures[future]
+            pending -= 1
+            metrics.set_gauge('fetch_queue_depth', pending)
+            try:
+                results[symbol] = future.result()
+            except Exception as e:
+                logger.error(f"Error fetching data for {symbol}: {str(e)}")
+                results[symbol] = None
+    return {symbol: results.get(symbol) for symbol in symbols}
+
+def _var_kernel_python(src: np.ndarray, vcmo: np.ndarray, valpha: float) -> np.ndarray:
+    """
+    VAR recurrence over plain Python floats (no per-element pandas indexing)
+    """
+    src_values = src.tolist()
+    cmo_values = vcmo.tolist()
+    n = len(src_values)
+    if n == 0:
+        return np.empty(0, dtype=np.float64)
+    
+    out = [0.0] * n
+    prev = src_values[0]
+    out[0] = prev
+    for i in range(1, n):
+        alpha_factor = valpha * abs(cmo_values[i])
+        prev = alpha_factor * src_values[i] + (1 - alpha_factor) * prev
+        out[i] = prev
+    return np.array(out, dtype=np.float64)
+
+if NUMBA_AVAILABLE:
+    @_lazy_njit(cache=True)
+    def _var_kernel_jit(src, vcmo, valpha):
+        n = src.shape[0]
+        out = np.empty(n, dtype=np.float64)
+        if n == 0:
+            return out
+        out[0] = src[0]
+        for i in range(1, n):
+            alpha_factor = valpha * abs(vcmo[i])
+            out[i] = alpha_factor * src[i] + (1 - alpha_factor) * out[i-1]
+        return out
+
+def var_kernel(src: np.ndarray, vcmo: np.ndarray, valpha: float, use_jit: Optional[bool] = None) -> np.ndarray:
+    """
+    Run the VAR recurrence on float64 arrays, using Numba when available
+    """
+    src = np.ascontiguousarray(src, dtype=np.float64)
+    vcmo = np.ascontiguousarray(vcmo, dtype=np.float64)
+    if use_jit is None:
+        use_jit = NUMBA_AVAILABLE
+    if use_jit and NUMBA_AVAILABLE:
+        return _var_kernel_jit(src, vcmo, float(valpha))
+    return _var_kernel_python(src, vcmo, float(valpha))
+
+def calculate_cmo(src: np.ndarray) -> np.ndarray:
+    """
+    Calculate the 9-bar absolute CMO used to weight VAR
+    """
+    src = np.asarray(src, dtype=np.float64)
+    vud1 = np.zeros(len(src), dtype=np.float64)
+    vdd1 = np.zeros(len(src), dtype=np.float64)
+    if len(src) > 1:
+        prev, cur = src[:-1], src[1:]
+        vud1[1:] = np.where(cur > prev, cur - prev, 0)
+        vdd1[1:] = np.where(cur < prev, prev - cur, 0)
+    
+    vUD = pd.Series(vud1).rolling(window=9, min_periods=1).sum().to_numpy()
+    vDD = pd.Series(vdd1).rolling(window=9, min_periods=1).sum().to_numpy()
+    
+    denominator = vUD + vDD
+    with np.errstate(divide='ignore', invalid='ignore'):
+        vCMO = np.where(denominator != 0, (vUD - vDD) / denominator, 0)
+    return np.where(np.isnan(vCMO), 0.0, vCMO)
+
+def calculate_var_function(src: pd.Series, length: int = 5, use_jit: Optional[bool] = None) -> pd.Series:
     """
     Calculate VAR using Pine Script logic
     """
     try:
         valpha = 2 / (length + 1)
-        vud1 = pd.Series(np.where(src > src.shift(1), src - src.shift(1), 0), index=src.index)
-        vdd1 = pd.Series(np.where(src < src.shift(1), src.shift(1) - src, 0), index=src.index)
-        
-        vUD = vud1.rolling(window=9, min_periods=1).sum()
-        vDD = vdd1.rolling(window=9, min_periods=1).sum()
-        
-        denominator = vUD + vDD
-        vCMO = np.where(denominator != 0, (vUD - vDD) / denominator, 0)
-        vCMO = pd.Series(vCMO, index=src.index).fillna(0)
-        
-        VAR = pd.Series(index=src.index, dtype=float)
-        VAR.iloc[0] = src.iloc[0]
-        
-        for i in range(1, len(src)):
-            alpha_factor = valpha * abs(vCMO.iloc[i])
-            VAR.iloc[i] = (alpha_factor * src.iloc[i] + (1 - alpha_factor) * VAR.iloc[i-1])
-        
-        return VAR
+        values = src.to_numpy(dtype=np.float64)
+        vCMO = calculate_cmo(values)
+        VAR = var_kernel(values, vCMO, valpha, use_jit)
+        return pd.Series(VAR, index=src.index, dtype=float)
     except Exception as e:
         logger.error(f"Error in VAR calculation: {str(e)}")
         return pd.Series(index=src.index, dtype=float)
 
-def calculate_ott(data: pd.DataFrame, length: int = 5, percent: float = 1.5) -> Tuple[pd.Series, pd.Series, pd.Series]:
+def _ott_kernel_python(mavg: np.ndarray, percent: float) -> Tuple[np.ndarray, np.ndarray]:
     """
-    Calculate OTT indicator
+    Single-pass OTT trailing-stop state machine over plain Python floats
     """
-    try:
-        if data is None or data.empty or len(data) < length:
-            logger.warning("Insufficient data for OTT calculation")
-            empty_series = pd.Series(index=data.index if data is not None else [], dtype=float)
-            return empty_series, empty_series, empty_series
-        
-        src = data['Close'].copy()
-        VAR = calculate_var_function(src, length)
-        MAvg = VAR.copy()
-        
-        fark = MAvg * percent * 0.01
-        longStop = MAvg - fark
-        shortStop = MAvg + fark
-        
-        longStop_adj = pd.Series(index=data.index, dtype=float)
-        shortStop_adj = pd.Series(index=data.index, dtype=float)
-        dir_series = pd.Series(index=data.index, dtype=int)
-        MT = pd.Series(index=data.index, dtype=float)
-        OTT = pd.Series(index=data.index, dtype=float)
-        
-        longStop_adj.iloc[0] = longStop.iloc[0]
-        shortStop_adj.iloc[0] = shortStop.iloc[0]
-        dir_series.iloc[0] = 1
-        
-        for i in range(1, len(data)):
-            if pd.notna(MAvg.iloc[i]) and pd.notna(longStop_adj.iloc[i-1]):
-                if MAvg.iloc[i] > longStop_adj.iloc[i-1]:
-                    longStop_adj.iloc[i] = max(longStop.iloc[i], longStop_adj.iloc[i-1])
-                else:
-                    longStop_adj.iloc[i] = longStop.iloc[i]
-            else:
-                longStop_adj.iloc[i] = longStop.iloc[i]
+    m_values = mavg.tolist()
+    n = len(m_values)
+    ott = [0.0] * n
+    direction = [1] * n
+    if n == 0:
+        return np.empty(0, dtype=np.float64), np.empty(0, dtype=np.int8)
+    
+    prev_long = prev_short = float('nan')
+    prev_dir = 1
+    for i in range(n):
+        m = m_values[i]
+        fark = m * percent * 0.01
+        long_stop = m - fark
+        short_stop = m + fark
+        
+        if i == 0:
+            dir_i = 1
+        else:
+            if m > prev_long:
+                long_stop = max(long_stop, prev_long)
+            if m < prev_short:
+                short_stop = min(short_stop, prev_short)
             
-            if pd.notna(MAvg.iloc[i]) and pd.notna(shortStop_adj.iloc[i-1]):
-                if MAvg.iloc[i] < shortStop_adj.iloc[i-1]:
-                    shortStop_adj.iloc[i] = min(shortStop.iloc[i], shortStop_adj.iloc[i-1])
-                else:
-                    shortStop_adj.iloc[i] = shortStop.iloc[i]
+            if prev_dir == -1 and m > prev_short:
+                dir_i = 1
+            elif prev_dir == 1 and m < prev_long:
+                dir_i = -1
             else:
-                shortStop_adj.iloc[i] = shortStop.iloc[i]
+                dir_i = prev_dir
+        
+        mt = long_stop if dir_i == 1 else short_stop
+        if m == m and mt == mt:
+            ott[i] = mt * (200 + percent) / 200 if m > mt else mt * (200 - percent) / 200
+        else:
+            ott[i] = mt
+        direction[i] = dir_i
+        prev_long, prev_short, prev_dir = long_stop, short_stop, dir_i
+    
+    return np.array(ott, dtype=np.float64), np.array(direction, dtype=np.int8)
+
+if NUMBA_AVAILABLE:
+    @_lazy_njit(cache=True)
+    def _ott_kernel_jit(mavg, percent):
+        n = mavg.shape[0]
+        ott = np.empty(n, dtype=np.float64)
+        direction = np.empty(n, dtype=np.int8)
+        prev_long = np.nan
+        prev_short = np.nan
+        prev_dir = 1
+        for i in range(n):
+            m = mavg[i]
+            fark = m * percent * 0.01
+            long_stop = m - fark
+            short_stop = m + fark
             
-            if (dir_series.iloc[i-1] == -1 and 
-                pd.notna(MAvg.iloc[i]) and pd.notna(shortStop_adj.iloc[i-1]) and
-                MAvg.iloc[i] > shortStop_adj.iloc[i-1]):
-                dir_series.iloc[i] = 1
-            elif (dir_series.iloc[i-1] == 1 and 
-                  pd.notna(MAvg.iloc[i]) and pd.notna(longStop_adj.iloc[i-1]) and
-                  MAvg.iloc[i] < longStop_adj.iloc[i-1]):
-                dir_series.iloc[i] = -1
+            if i == 0:
+                dir_i = 1
             else:
-                dir_series.iloc[i] = dir_series.iloc[i-1]
-        
-        for i in range(len(data)):
-            MT.iloc[i] = longStop_adj.iloc[i] if dir_series.iloc[i] == 1 else shortStop_adj.iloc[i]
+                if m > prev_long and prev_long > long_stop:
+                    long_stop = prev_long
+                if m < prev_short and prev_short < short_stop:
+                    short_stop = prev_short
+                
+                if prev_dir == -1 and m > prev_short:
+                    dir_i = 1
+                elif prev_dir == 1 and m < prev_long:
+                    dir_i = -1
+                else:
+                    dir_i = prev_dir
             
-            if pd.notna(MAvg.iloc[i]) and pd.notna(MT.iloc[i]):
-                if MAvg.iloc[i] > MT.iloc[i]:
-                    OTT.iloc[i] = MT.iloc[i] * (200 + percent) / 200
+            mt = long_stop if dir_i == 1 else short_stop
+            if not np.isnan(m) and not np.isnan(mt):
+                if m > mt:
+                    ott[i] = mt * (200 + percent) / 200
                 else:
-                    OTT.iloc[i] = MT.iloc[i] * (200 - percent) / 200
+                    ott[i] = mt * (200 - percent) / 200
             else:
-                OTT.iloc[i] = MT.iloc[i]
+                ott[i] = mt
+            direction[i] = dir_i
+            prev_long = long_stop
+            prev_short = short_stop
+            prev_dir = dir_i
+        return ott, direction
+
+def ott_kernel(mavg: np.ndarray, percent: float, use_jit: Optional[bool] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Run the OTT recurrence on a float64 MAvg array, returning (OTT, direction)
+    """
+    mavg = np.ascontiguousarray(mavg, dtype=np.float64)
+    if use_jit is None:
+        use_jit = NUMBA_AVAILABLE
+    if use_jit and NUMBA_AVAILABLE:
+        return _ott_kernel_jit(mavg, float(percent))
+    return _ott_kernel_python(mavg, float(percent))
+
+def calculate_ott(data: pd.DataFrame, length: int = 5, percent: float = 1.5,
+                  use_jit: Optional[bool] = None) -> Tuple[pd.Series, pd.Series, pd.Series]:
+    """
+    Calculate OTT indicator
+    """
+    try:
+        if data is None or data.empty or len(data) < length:
+            logger.warning("Insufficient data for OTT calculation")
+            empty_series = pd.Series(index=data.index if data is not None else [], dtype=float)
+            return empty_series, empty_series, empty_series
+        
+        MAvg = calculate_var_function(data['Close'], length, use_jit)
+        OTT, direction = ott_kernel(MAvg.to_numpy(), percent, use_jit)
         
-        return MAvg, OTT, dir_series
+        return MAvg, pd.Series(OTT, index=data.index), pd.Series(direction, index=data.index, dtype=int)
     
     except Exception as e:
         logger.error(f"Error in OTT calculation: {str(e)}")
         empty_series = pd.Series(index=data.index if data is not None else [], dtype=float)
         return empty_series, empty_series, empty_series
 
+def calculate_ott_arrays(closes: np.ndarray, length: int = 5, percent: float = 1.5,
+                         use_jit: Optional[bool] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    calculate_ott on a bare close array (e.g. a BarBuffer view), returning (MAvg, OTT, direction)
+    """
+    closes = np.ascontiguousarray(closes, dtype=np.float64)
+    MAvg = var_kernel(closes, calculate_cmo(closes), 2 / (length + 1), use_jit)
+    OTT, direction = ott_kernel(MAvg, percent, use_jit)
+    return MAvg, OTT, direction
+
 def detect_signals(MAvg: pd.Series, OTT: pd.Series) -> Tuple[pd.Series, pd.Series]:
     """
     Detect buy and sell signals
@@ -637,145 +1501,2285 @@ def detect_signals(MAvg: pd.Series, OTT: pd.Series) -> Tuple[pd.Series, pd.Serie
         empty_signals = pd.Series([False] * len(MAvg), index=MAvg.index)
         return empty_signals, empty_signals
 
-def validate_email_settings(email_settings: dict) -> bool:
-    """Validate email settings"""
-    required_fields = ['email', 'password', 'recipient']
-    return all(email_settings.get(field) for field in required_fields)
+def detect_signals_array(MAvg: np.ndarray, OTT: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Array form of detect_signals; works along axis 0 for 1-D or 2-D inputs
+    """
+    buy = np.zeros(MAvg.shape, dtype=bool)
+    sell = np.zeros(MAvg.shape, dtype=bool)
+    if len(MAvg) > 3:
+        m_now, m_prev = MAvg[3:], MAvg[2:-1]
+        ott_2, ott_3 = OTT[1:-2], OTT[:-3]
+        with np.errstate(invalid='ignore'):
+            buy[3:] = (m_now > ott_2) & (m_prev <= ott_3)
+            sell[3:] = (m_now < ott_2) & (m_prev >= ott_3)
+    return buy, sell
 
-def send_email_alert(symbol: str, signal_type: str, price: float, email_settings: dict) -> bool:
+def signal_position(buy: np.ndarray, sell: np.ndarray, allow_short: bool = False) -> np.ndarray:
     """
-    Send email alert
+    Position held after each bar: 1 from a buy signal until the next sell, then flat (or -1)
     """
-    try:
-        if not validate_email_settings(email_settings):
-            logger.warning("Email settings incomplete")
-            return False
-        
-        msg = MIMEMultipart()
-        msg['From'] = email_settings['email']
-        msg['To'] = email_settings['recipient']
-        msg['Subject'] = f"OTT Alert: {signal_type.upper()} Signal for {symbol}"
-        
-        body = f"""
-        OTT Strategy Alert
-        
-        Symbol: {symbol}
-        Signal: {signal_type.upper()}
-        Price: ₹{price:.2f}
-        Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-        
-        This is an automated alert from your OTT trading system.
-        """
-        
-        msg.attach(MIMEText(body, 'plain'))
-        
-        with smtplib.SMTP(email_settings['smtp_server'], email_settings['smtp_port']) as server:
-            server.starttls()
-            server.login(email_settings['email'], email_settings['password'])
-            text = msg.as_string()
-            server.sendmail(email_settings['email'], email_settings['recipient'], text)
-        
-        logger.info(f"Email alert sent for {symbol} - {signal_type}")
+    marks = np.where(buy, 1.0, np.where(sell, -1.0 if allow_short else 0.0, np.nan))
+    return pd.DataFrame(marks).ffill().fillna(0.0).to_numpy().reshape(np.shape(buy))
+
+def _sweep_length(closes: np.ndarray, length: int, percents: list) -> list:
+    """
+    Evaluate every percent for one length, computing VAR only once
+    """
+    valpha = 2 / (length + 1)
+    MAvg = var_kernel(closes, calculate_cmo(closes), valpha)
+    bar_returns = np.zeros(len(closes))
+    bar_returns[1:] = closes[1:] / closes[:-1] - 1
+    
+    rows = []
+    for percent in percents:
+        OTT, _ = ott_kernel(MAvg, percent)
+        buy, sell = detect_signals_array(MAvg, OTT)
+        position = signal_position(buy, sell)
+        strategy_returns = np.zeros(len(closes))
+        strategy_returns[1:] = position[:-1] * bar_returns[1:]
+        rows.append({
+            'length': length,
+            'percent': percent,
+            'buy_signals': int(buy.sum()),
+            'sell_signals': int(sell.sum()),
+            'total_return': float(np.prod(1 + strategy_returns) - 1),
+            'exposure': float(position.mean()) if len(position) else 0.0,
+        })
+    return rows
+
+def sweep_ott_parameters(data: pd.DataFrame, lengths, percents, processes: Optional[int] = None) -> pd.DataFrame:
+    """
+    Evaluate a (length x percent) grid of OTT parameters for one symbol.
+    VAR is computed once per length and reused across all percents; pass
+    processes > 1 to fan the lengths out over a process pool.
+    """
+    columns = ['length', 'percent', 'buy_signals', 'sell_signals', 'total_return', 'exposure']
+    if data is None or data.empty:
+        return pd.DataFrame(columns=columns)
+    
+    closes = data['Close'].to_numpy(dtype=np.float64)
+    lengths = [int(length) for length in lengths]
+    percents = [float(percent) for percent in percents]
+    
+    if processes and processes > 1 and len(lengths) > 1:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            futures = [executor.submit(_sweep_length, closes, length, percents) for length in lengths]
+            results = [future.result() for future in futures]
+    else:
+        results = [_sweep_length(closes, length, percents) for length in lengths]
+    
+    rows = [row for result in results for row in result]
+    return pd.DataFrame(rows, columns=columns)
+
+def calculate_ott_matrix(closes, length: int = 5, percent: float = 1.5
+                         ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Calculate MAvg, OTT, direction and buy/sell signals for a (bars x symbols) close matrix.
+    The recurrence steps along time and is vectorized across symbols. Columns may start
+    late (leading NaNs); later gaps are forward-filled.
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    if closes.ndim == 1:
+        closes = closes[:, None]
+    closes = pd.DataFrame(closes).ffill().to_numpy()
+    n_bars, n_symbols = closes.shape
+    
+    diff = np.zeros_like(closes)
+    if n_bars > 1:
+        diff[1:] = closes[1:] - closes[:-1]
+    diff = np.where(np.isnan(diff), 0.0, diff)
+    vud1 = np.where(diff > 0, diff, 0.0)
+    vdd1 = np.where(diff < 0, -diff, 0.0)
+    vUD = pd.DataFrame(vud1).rolling(window=9, min_periods=1).sum().to_numpy()
+    vDD = pd.DataFrame(vdd1).rolling(window=9, min_periods=1).sum().to_numpy()
+    denominator = vUD + vDD
+    with np.errstate(divide='ignore', invalid='ignore'):
+        alpha = (2 / (length + 1)) * np.abs(np.where(denominator != 0, (vUD - vDD) / denominator, 0.0))
+    
+    MAvg = np.full((n_bars, n_symbols), np.nan)
+    OTT = np.full((n_bars, n_symbols), np.nan)
+    direction = np.ones((n_bars, n_symbols), dtype=np.int8)
+    prev_var = np.full(n_symbols, np.nan)
+    prev_long = np.full(n_symbols, np.nan)
+    prev_short = np.full(n_symbols, np.nan)
+    prev_dir = np.ones(n_symbols, dtype=np.int8)
+    
+    with np.errstate(invalid='ignore'):
+        for i in range(n_bars):
+            src = closes[i]
+            af = alpha[i]
+            started = ~np.isnan(prev_var)
+            m = np.where(started, af * src + (1 - af) * prev_var, src)
+            
+            fark = m * percent * 0.01
+            long_stop = m - fark
+            short_stop = m + fark
+            long_stop = np.where(m > prev_long, np.maximum(long_stop, prev_long), long_stop)
+            short_stop = np.where(m < prev_short, np.minimum(short_stop, prev_short), short_stop)
+            dir_i = np.where((prev_dir == -1) & (m > prev_short), 1,
+                             np.where((prev_dir == 1) & (m < prev_long), -1, prev_dir)).astype(np.int8)
+            
+            mt = np.where(dir_i == 1, long_stop, short_stop)
+            OTT[i] = np.where(m > mt, mt * (200 + percent) / 200, mt * (200 - percent) / 200)
+            OTT[i] = np.where(np.isnan(m) | np.isnan(mt), mt, OTT[i])
+            MAvg[i] = m
+            direction[i] = dir_i
+            prev_var, prev_long, prev_short, prev_dir = m, long_stop, short_stop, dir_i
+    
+    buy, sell = detect_signals_array(MAvg, OTT)
+    return MAvg, OTT, direction, buy, sell
+
+def build_close_matrix(frames: dict) -> pd.DataFrame:
+    """
+    Align per-symbol OHLC frames into one (bars x symbols) close-price frame
+    """
+    closes = {symbol: data['Close'] for symbol, data in frames.items() if data is not None and not data.empty}
+    if not closes:
+        return pd.DataFrame()
+    return pd.concat(closes, axis=1).sort_index()
+
+class OTTState:
+    """
+    Streaming OTT state: each update() costs O(1) regardless of history length
+    """
+    __slots__ = ('length', 'percent', 'valpha', 'ups', 'downs', 'prev_close', 'var', 'long_stop',
+                 'short_stop', 'direction', 'mavg_history', 'ott_history', 'recent_signals',
+                 'last_timestamp', 'bars', 'last_signal', 'bars_since_signal')
+    
+    def __init__(self, length: int = 5, percent: float = 1.5, window: int = 9):
+        self.length = length
+        self.percent = percent
+        self.valpha = 2 / (length + 1)
+        self.ups = deque(maxlen=window)
+        self.downs = deque(maxlen=window)
+        self.prev_close = None
+        self.var = None
+        self.long_stop = float('nan')
+        self.short_stop = float('nan')
+        self.direction = 1
+        self.mavg_history = deque(maxlen=2)
+        self.ott_history = deque(maxlen=4)
+        self.recent_signals = deque(maxlen=3)
+        self.last_timestamp = None
+        self.bars = 0
+        # Last crossover (1 buy, -1 sell, 0 none yet) and bars since it
+        self.last_signal = 0
+        self.bars_since_signal = -1
+    
+    def copy(self) -> 'OTTState':
+        return copy.deepcopy(self)
+    
+    def update(self, close: float, timestamp=None) -> Tuple[float, float, int]:
+        """
+        Append one bar close and return its (MAvg, OTT, direction)
+        """
+        close = float(close)
+        prev = self.prev_close
+        if prev is None:
+            self.ups.append(0.0)
+            self.downs.append(0.0)
+        else:
+            self.ups.append(close - prev if close > prev else 0.0)
+            self.downs.append(prev - close if close < prev else 0.0)
+        self.prev_close = close
+        
+        # Recompute the 9-bar sums exactly so long streams do not drift
+        vUD = math.fsum(self.ups)
+        vDD = math.fsum(self.downs)
+        denominator = vUD + vDD
+        vCMO = (vUD - vDD) / denominator if denominator != 0 else 0.0
+        
+        if self.var is None:
+            self.var = close
+        else:
+            alpha_factor = self.valpha * abs(vCMO)
+            self.var = alpha_factor * close + (1 - alpha_factor) * self.var
+        
+        m = self.var
+        percent = self.percent
+        fark = m * percent * 0.01
+        long_stop = m - fark
+        short_stop = m + fark
+        if self.bars == 0:
+            direction = 1
+        else:
+            if m > self.long_stop:
+                long_stop = max(long_stop, self.long_stop)
+            if m < self.short_stop:
+                short_stop = min(short_stop, self.short_stop)
+            
+            if self.direction == -1 and m > self.short_stop:
+                direction = 1
+            elif self.direction == 1 and m < self.long_stop:
+                direction = -1
+            else:
+                direction = self.direction
+        
+        mt = long_stop if direction == 1 else short_stop
+        if m == m and mt == mt:
+            ott = mt * (200 + percent) / 200 if m > mt else mt * (200 - percent) / 200
+        else:
+            ott = mt
+        self.long_stop, self.short_stop, self.direction = long_stop, short_stop, direction
+        
+        # Same crossover rule as detect_signals: MAvg against OTT shifted by 2
+        self.mavg_history.append(m)
+        self.ott_history.append(ott)
+        buy = sell = False
+        if len(self.ott_history) == 4:
+            prev_m = self.mavg_history[0]
+            ott_2, ott_3 = self.ott_history[1], self.ott_history[0]
+            buy = m > ott_2 and prev_m <= ott_3
+            sell = m < ott_2 and prev_m >= ott_3
+        self.recent_signals.append((buy, sell))
+        if buy or sell:
+            self.last_signal = 1 if buy else -1
+            self.bars_since_signal = 0
+        elif self.last_signal:
+            self.bars_since_signal += 1
+        
+        self.bars += 1
+        if timestamp is not None:
+            self.last_timestamp = timestamp
+        return m, ott, direction
+    
+    def update_many(self, bars, timestamps=None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Append a sequence of bar closes, returning aligned MAvg, OTT and direction arrays
+        """
+        closes = bars['Close'] if isinstance(bars, pd.DataFrame) else bars
+        if timestamps is None and isinstance(closes, pd.Series):
+            timestamps = closes.index
+        closes = np.asarray(closes, dtype=np.float64)
+        
+        n = len(closes)
+        mavg = np.empty(n, dtype=np.float64)
+        ott = np.empty(n, dtype=np.float64)
+        direction = np.empty(n, dtype=np.int8)
+        for i in range(n):
+            ts = timestamps[i] if timestamps is not None else None
+            mavg[i], ott[i], direction[i] = self.update(closes[i], ts)
+        return mavg, ott, direction
+
+def verify_streaming_ott(data: pd.DataFrame, length: int = 5, percent: float = 1.5,
+                         tolerance: float = 1e-9) -> bool:
+    """
+    Check that OTTState reproduces the batch calculate_ott output on the same bars
+    """
+    MAvg, OTT, dir_series = calculate_ott(data, length, percent)
+    if MAvg.empty:
+        return False
+    mavg, ott, direction = OTTState(length, percent).update_many(data['Close'])
+    
+    matches = (np.allclose(mavg, MAvg.to_numpy(), rtol=tolerance, atol=0, equal_nan=True) and
+               np.allclose(ott, OTT.to_numpy(), rtol=tolerance, atol=0, equal_nan=True) and
+               np.array_equal(direction, dir_series.to_numpy()))
+    if not matches:
+        logger.warning("Streaming OTT state diverged from batch calculate_ott")
+    return matches
+
+def update_ott_state(symbol: str, bars: BarBuffer, length: int = 5, percent: float = 1.5,
+                     interval: str = "30m") -> OTTState:
+    """
+    Feed only unseen closed bars into the symbol's OTTState for interval.
+    The still-forming last bar is applied to a copy, so it can change between scans.
+    """
+    if isinstance(bars, pd.DataFrame):
+        bars = BarBuffer.from_frame(bars)
+    timestamps, closes = bars.timestamps, bars.closes
+    key = (symbol, interval)
+    state = ott_states.get(key)
+    if (state is None or state.length != length or state.percent != percent or
+            (state.last_timestamp is not None and state.last_timestamp < timestamps[0])):
+        state = OTTState(length, percent)
+        ott_states[key] = state
+    
+    start = 0
+    if state.last_timestamp is not None:
+        start = int(np.searchsorted(timestamps[:-1], state.last_timestamp, side='right'))
+    state.update_many(closes[start:-1], timestamps[start:-1])
+    
+    live = state.copy()
+    live.update(closes[-1], int(timestamps[-1]))
+    return live
+
+class BarBuffer:
+    """
+    Fixed-capacity OHLCV store in contiguous NumPy arrays: int64 epoch-second
+    times and float64 open/high/low/close/volume, so every value round-trips exactly.
+    Appends go to the end of an array with a little slack; when it fills, the
+    newest capacity bars are moved to the front, so the live window is always
+    contiguous and the column properties are zero-copy views.
+    """
+    __slots__ = ('capacity', 'tz', 'start', 'end', 'times', 'open', 'high', 'low', 'close', 'volume')
+    
+    def __init__(self, capacity: int = 512, tz=None, slack: Optional[int] = None):
+        self.capacity = capacity
+        self.tz = tz
+        self.start = 0
+        self.end = 0
+        size = capacity + (max(16, capacity // 8) if slack is None else slack)
+        self.times = np.empty(size, dtype=np.int64)
+        self.open = np.empty(size, dtype=np.float64)
+        self.high = np.empty(size, dtype=np.float64)
+        self.low = np.empty(size, dtype=np.float64)
+        self.close = np.empty(size, dtype=np.float64)
+        self.volume = np.empty(size, dtype=np.float64)
+    
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, capacity: Optional[int] = None) -> 'BarBuffer':
+        buffer = cls(capacity or len(frame) + max(8, len(frame) // 8), frame.index.tz)
+        buffer.merge_frame(frame)
+        return buffer
+    
+    def __len__(self) -> int:
+        return self.end - self.start
+    
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self.times[self.start:self.end]
+    
+    @property
+    def opens(self) -> np.ndarray:
+        return self.open[self.start:self.end]
+    
+    @property
+    def highs(self) -> np.ndarray:
+        return self.high[self.start:self.end]
+    
+    @property
+    def lows(self) -> np.ndarray:
+        return self.low[self.start:self.end]
+    
+    @property
+    def closes(self) -> np.ndarray:
+        return self.close[self.start:self.end]
+    
+    @property
+    def volumes(self) -> np.ndarray:
+        return self.volume[self.start:self.end]
+    
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        return int(self.times[self.end - 1]) if self.end > self.start else None
+    
+    @property
+    def nbytes(self) -> int:
+        return sum(column.nbytes for column in (self.times, self.open, self.high, self.low, self.close, self.volume))
+    
+    def extend(self, times: np.ndarray, open_: np.ndarray, high: np.ndarray, low: np.ndarray,
+               close: np.ndarray, volume: Optional[np.ndarray] = None):
+        """Append bars (oldest first); only the newest capacity bars are kept"""
+        n = len(times)
+        if n > self.capacity:
+            cut = n - self.capacity
+            times, open_, high, low, close = times[cut:], open_[cut:], high[cut:], low[cut:], close[cut:]
+            volume = volume[cut:] if volume is not None else None
+            n = self.capacity
+        
+        if self.end + n > len(self.times):
+            # Compact: move the bars still in the window to the front
+            keep = min(len(self), self.capacity - n)
+            old = self.end - keep
+            for column in (self.times, self.open, self.high, self.low, self.close, self.volume):
+                column[:keep] = column[old:self.end]
+            self.start, self.end = 0, keep
+        
+        rows = slice(self.end, self.end + n)
+        self.times[rows] = times
+        self.open[rows] = open_
+        self.high[rows] = high
+        self.low[rows] = low
+        self.close[rows] = close
+        self.volume[rows] = volume if volume is not None else 0.0
+        self.end += n
+        self.start = max(self.start, self.end - self.capacity)
+    
+    def truncate(self, length: int):
+        """Drop every bar after the first length"""
+        self.end = self.start + max(0, min(length, len(self)))
+    
+    def trim_before(self, timestamp: int):
+        """Drop bars older than timestamp"""
+        self.start += int(np.searchsorted(self.timestamps, timestamp, side='left'))
+    
+    def merge_frame(self, frame: pd.DataFrame):
+        """
+        Merge a freshly fetched frame: bars from our last timestamp on replace
+        ours (the forming bar may have changed), older rows are ignored.
+        """
+        if frame is None or frame.empty:
+            return
+        times = _epoch_seconds(frame.index)
+        first = 0
+        if len(self):
+            first = int(np.searchsorted(times, self.last_timestamp, side='left'))
+            if first == len(times):
+                return
+            self.truncate(int(np.searchsorted(self.timestamps, times[first], side='left')))
+        volume = frame['Volume'].to_numpy()[first:] if 'Volume' in frame else None
+        self.extend(times[first:], frame['Open'].to_numpy()[first:], frame['High'].to_numpy()[first:],
+                    frame['Low'].to_numpy()[first:], frame['Close'].to_numpy()[first:], volume)
+    
+    def copy(self) -> 'BarBuffer':
+        """Compact, independent snapshot of the current window"""
+        snapshot = BarBuffer(max(len(self), 1), self.tz, slack=0)
+        snapshot.extend(self.timestamps, self.opens, self.highs, self.lows, self.closes, self.volumes)
+        return snapshot
+    
+    def to_frame(self) -> pd.DataFrame:
+        """OHLCV DataFrame (copied columns, DatetimeIndex in the original timezone)"""
+        index = pd.to_datetime(self.timestamps, unit='s', utc=True)
+        index = index.tz_convert(self.tz) if self.tz is not None else index.tz_localize(None)
+        return pd.DataFrame({
+            'Open': self.opens.copy(),
+            'High': self.highs.copy(),
+            'Low': self.lows.copy(),
+            'Close': self.closes.copy(),
+            'Volume': self.volumes.copy(),
+        }, index=index)
+
+bar_buffers = {}
+
+def update_bar_buffer(symbol: str, interval: str, data: pd.DataFrame) -> BarBuffer:
+    """Merge a fetched frame into the symbol's persistent BarBuffer for interval"""
+    key = (symbol, interval)
+    window_start = _epoch_seconds(data.index[:1])[0]
+    buffer = bar_buffers.get(key)
+    if buffer is not None and buffer.last_timestamp is not None and buffer.last_timestamp >= window_start:
+        buffer.merge_frame(data)
+        buffer.trim_before(window_start)
+        if buffer.timestamps[0] == window_start:
+            return buffer
+    # First fetch, a gap since the last one, or a window that outgrew the buffer
+    buffer = BarBuffer.from_frame(data)
+    bar_buffers[key] = buffer
+    return buffer
+
+# NSE session open in exchange-local wall-clock seconds; resampled bars start here
+NSE_SESSION_OPEN = 9 * 3600 + 15 * 60
+
+class OHLCVResampler:
+    """
+    Incrementally aggregates base-interval OHLCV bars (e.g. 5m) into a coarser
+    interval (15m, 30m, 1h, 1d) held in a BarBuffer. Completed bars are kept; each
+    update re-aggregates only the base bars from the start of the last, still-forming
+    bar onward. Intraday bars are aligned to session_open in the index's local
+    wall-clock time.
+    """
+    
+    def __init__(self, interval: str, base_interval: str, session_open: int = NSE_SESSION_OPEN):
+        self.interval = interval
+        self.base_interval = base_interval
+        self.step = _interval_seconds(interval)
+        self.base_step = _interval_seconds(base_interval)
+        if self.step > 86400 or self.step % self.base_step:
+            raise ValueError(f"Cannot resample {base_interval} bars to {interval}")
+        self.session_open = session_open
+        self.bars = None
+    
+    def bucket_starts(self, index: pd.DatetimeIndex) -> np.ndarray:
+        """Wall-clock epoch seconds of the bar each timestamp falls into"""
+        wall = index.tz_localize(None) if index.tz is not None else index
+        seconds = wall.values.astype('datetime64[s]').astype(np.int64)
+        if self.step == 86400:
+            return seconds // 86400 * 86400
+        return self.session_open + (seconds - self.session_open) // self.step * self.step
+    
+    def _aggregate(self, base: pd.DataFrame) -> tuple:
+        """(times, open, high, low, close, volume) arrays; times are UTC epoch seconds"""
+        starts = self.bucket_starts(base.index)
+        n = len(starts)
+        first = np.flatnonzero(np.r_[True, starts[1:] != starts[:-1]])
+        last = np.r_[first[1:] - 1, n - 1]
+        # Shift wall-clock bucket starts by each bucket's UTC offset
+        wall = base.index.tz_localize(None) if base.index.tz is not None else base.index
+        offset = _epoch_seconds(base.index[first]) - wall[first].values.astype('datetime64[s]').astype(np.int64)
+        volume = None
+        if 'Volume' in base:
+            volume = np.add.reduceat(base['Volume'].to_numpy(dtype=np.float64), first)
+        return (starts[first] + offset,
+                base['Open'].to_numpy(dtype=np.float64)[first],
+                np.fmax.reduceat(base['High'].to_numpy(dtype=np.float64), first),
+                np.fmin.reduceat(base['Low'].to_numpy(dtype=np.float64), first),
+                base['Close'].to_numpy(dtype=np.float64)[last],
+                volume)
+    
+    def update(self, base: pd.DataFrame) -> Optional[BarBuffer]:
+        """Resampled bars covering base; the last bar may still be forming"""
+        if base is None or base.empty:
+            return self.bars
+        
+        base_times = _epoch_seconds(base.index)
+        if self.bars is not None and len(self.bars) and base_times[-1] >= self.bars.last_timestamp:
+            forming = self.bars.last_timestamp
+            self.bars.truncate(len(self.bars) - 1)
+            self.bars.extend(*self._aggregate(base[base_times >= forming]))
+        else:
+            bars = self._aggregate(base)
+            count = len(bars[0])
+            self.bars = BarBuffer(count + max(8, count // 8), base.index.tz)
+            self.bars.extend(*bars)
+        
+        # Drop bars that have scrolled out of the base window
+        window_start = self._aggregate(base.iloc[:1])[0][0]
+        self.bars.trim_before(window_start)
+        if self.bars.timestamps[0] > window_start:
+            # The window outgrew the buffer; rebuild it at the new size
+            self.bars = None
+            return self.update(base)
+        return self.bars
+
+def resample_bars(symbol: str, data: pd.DataFrame, base_interval: str, interval: str,
+                  session_open: int = NSE_SESSION_OPEN) -> BarBuffer:
+    """Derive interval bars for symbol from its base-interval frame through a persistent resampler"""
+    if interval == base_interval:
+        return update_bar_buffer(symbol, interval, data)
+    key = (symbol, base_interval, interval)
+    resampler = resamplers.get(key)
+    if resampler is None or resampler.session_open != session_open:
+        resampler = OHLCVResampler(interval, base_interval, session_open)
+        resamplers[key] = resampler
+    return resampler.update(data)
+
+def validate_email_settings(email_settings: dict) -> bool:
+    """Validate email settings"""
+    required_fields = ['email', 'password', 'recipient']
+    return all(email_settings.get(field) for field in required_fields)
+
+def build_alert_message(alerts: list, email_settings: dict) -> MIMEMultipart:
+    """
+    Build one email for a list of (symbol, signal_type, price, timestamp) alerts
+    """
+    msg = MIMEMultipart()
+    msg['From'] = email_settings['email']
+    msg['To'] = email_settings['recipient']
+    
+    if len(alerts) == 1:
+        symbol, signal_type, price, timestamp = alerts[0]
+        msg['Subject'] = f"OTT Alert: {signal_type.upper()} Signal for {symbol}"
+        body = f"""
+        OTT Strategy Alert
+        
+        Symbol: {symbol}
+        Signal: {signal_type.upper()}
+        Price: ₹{price:.2f}
+        Time: {timestamp.strftime('%Y-%m-%d %H:%M:%S')}
+        
+        This is an automated alert from your OTT trading system.
+        """
+    else:
+        msg['Subject'] = f"OTT Alert: {len(alerts)} Signals ({', '.join(a[0] for a in alerts[:5])}" + \
+            (", ..." if len(alerts) > 5 else "") + ")"
+        lines = "\n".join(
+            f"        {timestamp.strftime('%Y-%m-%d %H:%M:%S')}  {symbol:<12} {signal_type.upper():<4}  ₹{price:.2f}"
+            for symbol, signal_type, price, timestamp in alerts
+        )
+        body = f"""
+        OTT Strategy Alert Digest
+        
+{lines}
+        
+        This is an automated alert from your OTT trading system.
+        """
+    
+    msg.attach(MIMEText(body, 'plain'))
+    return msg
+
+def send_email_alert(symbol: str, signal_type: str, price: float, email_settings: dict) -> bool:
+    """
+    Send email alert
+    """
+    try:
+        if not validate_email_settings(email_settings):
+            logger.warning("Email settings incomplete")
+            return False
+        
+        msg = build_alert_message([(symbol, signal_type, price, datetime.now())], email_settings)
+        
+        with smtplib.SMTP(email_settings['smtp_server'], email_settings['smtp_port']) as server:
+            server.starttls()
+            server.login(email_settings['email'], email_settings['password'])
+            text = msg.as_string()
+            server.sendmail(email_settings['email'], email_settings['recipient'], text)
+        
+        logger.info(f"Email alert sent for {symbol} - {signal_type}")
         return True
         
     except Exception as e:
         logger.error(f"Email sending failed: {str(e)}")
         return False
 
-def add_alert_to_history(symbol: str, signal_type: str, price: float):
-    """Add alert to history with deduplication"""
-    global alerts_history, system_status
-    alert = {
-        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-        'symbol': symbol,
-        'signal': signal_type,
-        'price': price
-    }
+class MemorySMTPSink:
+    """
+    Stand-in for smtplib.SMTP that records messages instead of delivering them.
+    Pass MemorySMTPSink.factory() as EmailDispatcher's smtp_factory in tests.
+    """
+    
+    def __init__(self, host: str = 'localhost', port: int = 0, timeout: Optional[float] = None,
+                 outbox: Optional[list] = None):
+        self.host = host
+        self.port = port
+        self.outbox = outbox if outbox is not None else []
+        self.closed = False
+    
+    @classmethod
+    def factory(cls, outbox: Optional[list] = None):
+        outbox = outbox if outbox is not None else []
+        
+        def create(host, port, timeout=None):
+            return cls(host, port, timeout, outbox)
+        create.outbox = outbox
+        return create
+    
+    def starttls(self):
+        return (220, b'Ready')
+    
+    def login(self, user, password):
+        return (235, b'Accepted')
+    
+    def noop(self):
+        if self.closed:
+            raise smtplib.SMTPServerDisconnected("Connection closed")
+        return (250, b'OK')
+    
+    def sendmail(self, from_addr, to_addrs, msg):
+        if self.closed:
+            raise smtplib.SMTPServerDisconnected("Connection closed")
+        self.outbox.append((from_addr, to_addrs, msg))
+        return {}
+    
+    def quit(self):
+        self.closed = True
+    
+    close = quit
+
+class EmailDispatcher:
+    """
+    Background email sender. submit() only enqueues; a worker thread keeps one SMTP
+    connection open (reconnecting when it drops), sends everything submitted before each
+    flush() as a single digest, and retries failed sends with exponential backoff.
+    """
+    
+    _FLUSH = object()
+    _STOP = object()
+    
+    def __init__(self, email_settings: dict, smtp_factory=None, max_retries: int = 5,
+                 backoff: float = 2.0, max_backoff: float = 120.0, timeout: float = 30.0):
+        self.email_settings = email_settings
+        self.smtp_factory = smtp_factory or smtplib.SMTP
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.queue = queue.Queue()
+        self.connection = None
+        self.thread = None
+    
+    def start(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._run, name='email-dispatcher', daemon=True)
+            self.thread.start()
+    
+    def submit(self, symbol: str, signal_type: str, price: float):
+        self.queue.put((symbol, signal_type, price, datetime.now()))
+        metrics.set_gauge('email_queue_depth', self.queue.qsize())
+    
+    def flush(self):
+        """Send everything submitted so far as one message"""
+        self.queue.put(self._FLUSH)
+    
+    def stop(self, timeout: Optional[float] = None):
+        self.queue.put(self._FLUSH)
+        self.queue.put(self._STOP)
+        if self.thread is not None:
+            self.thread.join(timeout)
+        self._disconnect()
+    
+    def _connect(self):
+        settings = self.email_settings
+        server = self.smtp_factory(settings['smtp_server'], settings['smtp_port'], timeout=self.timeout)
+        server.starttls()
+        server.login(settings['email'], settings['password'])
+        return server
+    
+    def _disconnect(self):
+        if self.connection is not None:
+            try:
+                self.connection.quit()
+            except Exception:
+                pass
+            self.connection = None
+    
+    def _ensure_connection(self):
+        if self.connection is not None:
+            try:
+                self.connection.noop()
+                return self.connection
+            except Exception:
+                self._disconnect()
+        self.connection = self._connect()
+        return self.connection
+    
+    def _send(self, alerts: list) -> bool:
+        settings = self.email_settings
+        text = build_alert_message(alerts, settings).as_string()
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                self._ensure_connection().sendmail(settings['email'], settings['recipient'], text)
+                metrics.observe('email_send_seconds', time.perf_counter() - start)
+                metrics.inc('emails_sent_total')
+                logger.info(f"Email alert sent for {', '.join(f'{a[0]} - {a[1]}' for a in alerts)}")
+                return True
+            except Exception as e:
+                self._disconnect()
+                metrics.inc('email_failures_total')
+                if attempt == self.max_retries:
+                    logger.error(f"Email sending failed after {attempt + 1} attempts: {str(e)}")
+                    return False
+                delay = min(self.backoff * (2 ** attempt), self.max_backoff)
+                logger.warning(f"Email sending failed ({str(e)}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+        return False
+    
+    def _run(self):
+        pending = []
+        while True:
+            item = self.queue.get()
+            metrics.set_gauge('email_queue_depth', self.queue.qsize())
+            if item is self._STOP:
+                break
+            if item is self._FLUSH:
+                if pending and validate_email_settings(self.email_settings):
+                    self._send(pending)
+                elif pending:
+                    logger.warning("Email settings incomplete")
+                pending = []
+                continue
+            pending.append(item)
+
+class AlertLog:
+    """
+    Durable append-only alert log in SQLite (WAL mode).
+    Appends are committed in batches (every batch_size rows or flush_interval seconds)
+    so disk syncs are amortized; symbol and time are indexed for paginated queries.
+    """
+    
+    def __init__(self, path: str = 'ott_alerts.db', batch_size: int = 50, flush_interval: float = 2.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.lock = threading.RLock()
+        self.pending = 0
+        self.pid = None
+        self._conn = None
+        self.connect()
+    
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # SQLite handles must not cross fork(); each process opens its own
+        if self.pid != os.getpid():
+            self.connect()
+        return self._conn
+    
+    def connect(self):
+        with self.lock:
+            self.pid = os.getpid()
+            self.pending = 0
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS alerts (
+                    id INTEGER PRIMARY KEY,
+                    ts REAL NOT NULL,
+                    symbol TEXT NOT NULL,
+                    signal TEXT NOT NULL,
+                    price REAL NOT NULL,
+                    interval TEXT
+                )""")
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(alerts)")}
+            if 'interval' not in columns:
+                # Logs written before alerts recorded the bar interval they fired on
+                self._conn.execute("ALTER TABLE alerts ADD COLUMN interval TEXT")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_alerts_ts ON alerts (ts)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_alerts_symbol_ts ON alerts (symbol, ts)")
+            self.flusher = threading.Thread(target=self._flush_periodically, name='alert-log-flusher', daemon=True)
+            self.flusher.start()
+    
+    def append(self, when: datetime, symbol: str, signal_type: str, price: float,
+               interval: Optional[str] = None) -> int:
+        with self.lock:
+            conn = self.conn
+            if self.pending == 0:
+                conn.execute("BEGIN")
+            cursor = conn.execute("INSERT INTO alerts (ts, symbol, signal, price, interval) VALUES (?, ?, ?, ?, ?)",
+                                  (when.timestamp(), symbol, signal_type, float(price), interval))
+            self.pending += 1
+            if self.pending >= self.batch_size:
+                self.flush()
+            return cursor.lastrowid
+    
+    def query_after(self, last_id: int, limit: int = 1000) -> list:
+        """Alerts appended (by any process) after id last_id, oldest first"""
+        with self.lock:
+            rows = self.conn.execute("SELECT id, ts, symbol, signal, price, interval FROM alerts WHERE id > ? "
+                                     "ORDER BY id LIMIT ?", (last_id, limit)).fetchall()
+        return [self._row_to_alert(row) for row in rows]
+    
+    def max_id(self) -> int:
+        with self.lock:
+            return self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM alerts").fetchone()[0]
+    
+    def flush(self):
+        with self.lock:
+            if self.pending:
+                self.conn.execute("COMMIT")
+                self.pending = 0
+    
+    def _flush_periodically(self):
+        pid = os.getpid()
+        while self.pid == pid:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Alert log flush failed: {str(e)}")
+    
+    @staticmethod
+    def _row_to_alert(row) -> dict:
+        alert_id, ts, symbol, signal_type, price, interval = row
+        return {
+            'id': alert_id,
+            'timestamp': datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S'),
+            'symbol': symbol,
+            'signal': signal_type,
+            'price': price,
+            'interval': interval
+        }
+    
+    def query(self, since: Optional[datetime] = None, until: Optional[datetime] = None,
+              symbol: Optional[str] = None, before_id: Optional[int] = None, limit: int = 100) -> list:
+        """Alerts newest first; page backwards by passing the last id seen as before_id"""
+        clauses, params = [], []
+        if since is not None:
+            clauses.append("ts > ?")
+            params.append(since.timestamp())
+        if until is not None:
+            clauses.append("ts <= ?")
+            params.append(until.timestamp())
+        if symbol:
+            clauses.append("symbol = ?")
+            params.append(symbol)
+        if before_id is not None:
+            clauses.append("id < ?")
+            params.append(before_id)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = f"SELECT id, ts, symbol, signal, price, interval FROM alerts {where} ORDER BY ts DESC, id DESC LIMIT ?"
+        with self.lock:
+            rows = self.conn.execute(sql, params + [limit]).fetchall()
+        return [self._row_to_alert(row) for row in rows]
+    
+    def count_since(self, since: datetime) -> int:
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM alerts WHERE ts >= ?", (since.timestamp(),)).fetchone()[0]
+    
+    def last_seen_since(self, since: datetime) -> dict:
+        """Latest alert time per (symbol, signal) after since"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT symbol, signal, MAX(ts) FROM alerts WHERE ts >= ? GROUP BY symbol, signal",
+                (since.timestamp(),)).fetchall()
+        return {(symbol, signal_type): datetime.fromtimestamp(ts) for symbol, signal_type, ts in rows}
+    
+    def clear(self):
+        with self.lock:
+            self.flush()
+            self.conn.execute("DELETE FROM alerts")
+    
+    def close(self):
+        with self.lock:
+            self.flush()
+            self.conn.close()
+
+class AlertStore:
+    """
+    Bounded, thread-safe alert history kept in time order with native datetimes.
+    Deduplication is an O(1) lookup of the last alert per (symbol, signal), today's
+    count is maintained incrementally, and time-range queries bisect the ring buffer.
+    """
+    
+    def __init__(self, capacity: int = 100, dedup_seconds: float = 300, log: Optional[AlertLog] = None):
+        self.capacity = capacity
+        self.dedup_window = timedelta(seconds=dedup_seconds)
+        self.times = deque(maxlen=capacity)
+        self.alerts = deque(maxlen=capacity)
+        self.last_seen = {}
+        self.count_date = None
+        self.today_count = 0
+        self.lock = threading.RLock()
+        self.log = log
+        self.last_id = 0
+        if log is not None:
+            self.restore()
+    
+    def restore(self):
+        """
+        Rebuild recent state from the log with indexed queries: the newest capacity
+        alerts, the dedup window and today's count. Older history is not replayed.
+        """
+        now = datetime.now()
+        with self.lock:
+            self.log.flush()
+            self.last_id = self.log.max_id()
+            recent = self.log.query(limit=self.capacity)
+            self.times.clear()
+            self.alerts.clear()
+            for alert in reversed(recent):
+                del alert['id']
+                self.times.append(datetime.strptime(alert['timestamp'], '%Y-%m-%d %H:%M:%S'))
+                self.alerts.append(alert)
+            self.last_seen = self.log.last_seen_since(now - self.dedup_window)
+            self.count_date = now.date()
+            self.today_count = self.log.count_since(datetime.combine(now.date(), datetime.min.time()))
+        logger.info(f"Restored {len(recent)} alerts ({self.today_count} today) from {self.log.path}")
+    
+    def __len__(self) -> int:
+        return len(self.alerts)
+    
+    def add(self, symbol: str, signal_type: str, price: float, when: Optional[datetime] = None,
+            interval: Optional[str] = None) -> Optional[dict]:
+        """Record an alert; returns None if it duplicates a recent one"""
+        when = (when or datetime.now()).replace(microsecond=0)
+        key = (symbol, signal_type)
+        with self.lock:
+            last = self.last_seen.get(key)
+            if last is not None and when - last < self.dedup_window:
+                return None
+            self.last_seen[key] = when
+            if self.log is not None:
+                self.last_id = max(self.last_id, self.log.append(when, symbol, signal_type, price, interval))
+            
+            alert = {
+                'timestamp': when.strftime('%Y-%m-%d %H:%M:%S'),
+                'symbol': symbol,
+                'signal': signal_type,
+                'price': price,
+                'interval': interval
+            }
+            self._insert(when, alert)
+            return alert
+    
+    def sync(self) -> list:
+        """
+        Pull alerts another process has written to the shared log since the last
+        sync, oldest first. Used by web workers that do not run the scanner.
+        """
+        if self.log is None:
+            return []
+        with self.lock:
+            new_alerts = self.log.query_after(self.last_id)
+            for alert in new_alerts:
+                self.last_id = max(self.last_id, alert.pop('id'))
+                when = datetime.strptime(alert['timestamp'], '%Y-%m-%d %H:%M:%S')
+                key = (alert['symbol'], alert['signal'])
+                if key not in self.last_seen or self.last_seen[key] < when:
+                    self.last_seen[key] = when
+                self._insert(when, alert)
+        return new_alerts
+    
+    def _insert(self, when: datetime, alert: dict):
+        with self.lock:
+            if self.times and when < self.times[-1]:
+                # Out-of-order insert keeps the buffer sorted for bisection
+                index = self._bisect(when, right=True)
+                if len(self.times) == self.capacity:
+                    if index == 0:
+                        index = None
+                    else:
+                        self.times.popleft()
+                        self.alerts.popleft()
+                        index -= 1
+                if index is not None:
+                    self.times.insert(index, when)
+                    self.alerts.insert(index, alert)
+            else:
+                self.times.append(when)
+                self.alerts.append(alert)
+            
+            if when.date() == self._today():
+                self.today_count += 1
+    
+    def _today(self):
+        today = datetime.now().date()
+        if self.count_date != today:
+            self.count_date = today
+            self.today_count = 0
+        return today
+    
+    def count_today(self) -> int:
+        with self.lock:
+            self._today()
+            return self.today_count
+    
+    def _bisect(self, when: datetime, right: bool = False) -> int:
+        lo, hi = 0, len(self.times)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.times[mid] < when or (right and self.times[mid] == when):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+    
+    def recent(self, limit: Optional[int] = None) -> list:
+        """Alerts newest first"""
+        with self.lock:
+            alerts = list(reversed(self.alerts))
+        return alerts[:limit] if limit is not None else alerts
+    
+    def between(self, start: datetime, end: Optional[datetime] = None, limit: Optional[int] = None) -> list:
+        """Alerts with start < time <= end, newest first"""
+        with self.lock:
+            lo = self._bisect(start, right=True)
+            hi = self._bisect(end, right=True) if end is not None else len(self.times)
+            alerts = [self.alerts[i] for i in range(hi - 1, lo - 1, -1)]
+        return alerts[:limit] if limit is not None else alerts
+    
+    def clear(self):
+        with self.lock:
+            self.times.clear()
+            self.alerts.clear()
+            self.last_seen.clear()
+            self.count_date = datetime.now().date()
+            self.today_count = 0
+            if self.log is not None:
+                self.log.clear()
+
+class StateStore:
+    """
+    Small JSON key/value table next to the alert log. In production mode the
+    monitor process publishes its metrics here and the web workers read them,
+    so no process depends on another's module globals.
+    """
+    
+    def __init__(self, path: str = 'ott_alerts.db'):
+        self.path = path
+        self.lock = threading.Lock()
+        self.pid = None
+        self._conn = None
+    
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self.pid != os.getpid():
+            self.pid = os.getpid()
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS state (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    updated REAL NOT NULL
+                )""")
+        return self._conn
+    
+    def put(self, key: str, value):
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO state (key, value, updated) VALUES (?, ?, ?)",
+                              (key, json.dumps(value, default=str), time.time()))
     
-    current_time = datetime.now()
-    for existing_alert in alerts_history[:5]:
-        existing_time = datetime.strptime(existing_alert['timestamp'], '%Y-%m-%d %H:%M:%S')
-        if (existing_alert['symbol'] == symbol and 
-            existing_alert['signal'] == signal_type and
-            (current_time - existing_time).total_seconds() < 300):
+    def get(self, key: str, default=None):
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+MARKET_STATE_MAGIC = b'OTTM'
+MARKET_STATE_LAYOUT = 2
+
+@functools.lru_cache(maxsize=None)
+def _market_state_dtypes() -> tuple:
+    """(header, slot) record layouts of the market state segment; built lazily to keep numpy off the start-up path"""
+    header = np.dtype([
+        ('magic', 'S4'), ('layout', '<u4'), ('seq', '<u8'), ('slots', '<u4'), ('used', '<u4'),
+        ('running', '<u4'), ('alerts_today', '<u4'), ('scans', '<u8'),
+        ('last_scan', '<f8'), ('next_scan', '<f8'), ('updated', '<f8'),
+    ])
+    slot = np.dtype([
+        ('symbol', 'S24'), ('interval', 'S8'), ('timestamp', '<i8'), ('price', '<f8'), ('ott', '<f8'),
+        ('mavg', '<f8'), ('updated', '<f8'), ('direction', 'i1'), ('signal', 'i1'), ('last_cross', 'i1'),
+        ('reserved', 'V1'), ('bars_since_cross', '<i4'),
+    ])
+    return header, slot
+
+class MarketState:
+    """
+    Latest bar, OTT and direction per (symbol, interval) plus the scanner's status
+    counters, in a fixed binary layout on a shared mmap. The scanner is the only
+    writer; any number of web processes map the same file.
+    A sequence number (seqlock) is odd while a write is in progress: readers copy
+    what they need and retry if it was odd or changed meanwhile, so they never
+    block the scanner. With no path the map is anonymous and process-local.
+    """
+    
+    STATUS_FORMAT = '%Y-%m-%d %H:%M:%S'
+    SIGNALS = {'BUY': 1, 'SELL': -1}
+    
+    def __init__(self, path: Optional[str] = None, slots: int = 4096):
+        self.path = path
+        self.slots = slots
+        self.lock = threading.Lock()
+        self.pid = None
+        self.map = None
+        self.header = None
+        self.records = None
+        self.index = {}
+    
+    def _open(self):
+        # Mapped per process; MAP_SHARED file pages are what the processes share
+        if self.pid == os.getpid():
             return
+        header_dtype, slot_dtype = _market_state_dtypes()
+        size = header_dtype.itemsize + self.slots * slot_dtype.itemsize
+        if self.path is None:
+            self.map = mmap.mmap(-1, size)
+        else:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if os.fstat(fd).st_size < size:
+                    os.ftruncate(fd, size)
+                self.map = mmap.mmap(fd, size)
+            finally:
+                os.close(fd)
+        self.header = np.ndarray((), header_dtype, buffer=self.map)
+        self.records = np.ndarray(self.slots, slot_dtype, buffer=self.map, offset=header_dtype.itemsize)
+        self.index = {}
+        self.pid = os.getpid()
+    
+    @contextmanager
+    def _write(self):
+        with self.lock:
+            self._open()
+            seq = int(self.header['seq'])
+            # Skip to the next odd number even if a previous writer died mid-write
+            seq += 1 if seq % 2 == 0 else 2
+            self.header['seq'] = seq
+            try:
+                yield
+            finally:
+                self.header['updated'] = time.time()
+                self.header['seq'] = seq + 1
+    
+    def reset(self):
+        """Writer side: start from an empty segment (once, when the scanner starts)"""
+        with self._write():
+            self.records[:] = np.zeros((), self.records.dtype)
+            self.index.clear()
+            self.header['magic'] = MARKET_STATE_MAGIC
+            self.header['layout'] = MARKET_STATE_LAYOUT
+            self.header['slots'] = self.slots
+            for field in ('used', 'running', 'alerts_today', 'scans', 'last_scan', 'next_scan'):
+                self.header[field] = 0
+    
+    def publish(self, results: list):
+        """Writer side: store the latest evaluate_bars results of one scan"""
+        now = time.time()
+        with self._write():
+            used = int(self.header['used'])
+            for result in results:
+                key = (result['symbol'], result['interval'])
+                slot = self.index.get(key)
+                if slot is None:
+                    if used == self.slots:
+                        logger.warning(f"Market state is full ({self.slots} slots); dropping {key}")
+                        continue
+                    slot = self.index[key] = used
+                    used += 1
+                self.records[slot] = (result['symbol'].encode(), result['interval'].encode(),
+                                      result['timestamp'], result['price'], result['ott'], result['mavg'],
+                                      now, result['direction'], self.SIGNALS.get(result['signal'], 0),
+                                      self.SIGNALS.get(result['last_cross'], 0), b'', result['bars_since_cross'])
+            self.header['used'] = used
+            self.header['scans'] += 1
+    
+    def set_status(self, status: dict):
+        """Writer side: mirror the system_status counters"""
+        def epoch(value):
+            return datetime.strptime(value, self.STATUS_FORMAT).timestamp() if value else 0.0
+        
+        with self._write():
+            self.header['running'] = bool(status.get('running'))
+            self.header['alerts_today'] = status.get('alerts_today', 0)
+            self.header['last_scan'] = epoch(status.get('last_scan'))
+            self.header['next_scan'] = epoch(status.get('next_scan'))
+    
+    def snapshot(self, retries: int = 1000) -> Optional[tuple]:
+        """
+        Reader side: consistent copies of (header, used records), or None if the
+        scanner has not written the segment yet
+        """
+        self._open()
+        for _ in range(retries):
+            seq = int(self.header['seq'])
+            if seq % 2 == 0:
+                header = self.header.copy()
+                records = self.records[:min(int(header['used']), self.slots)].copy()
+                if int(self.header['seq']) == seq:
+                    if header['magic'] != MARKET_STATE_MAGIC or header['layout'] != MARKET_STATE_LAYOUT:
+                        return None
+                    return header, records
+            time.sleep(0)
+        logger.warning("Market state stayed busy; no consistent snapshot")
+        return None
     
-    alerts_history.insert(0, alert)
-    if len(alerts_history) > 100:
-        alerts_history = alerts_history[:100]
+    def status(self) -> Optional[dict]:
+        """Reader side: system_status counters as written by the scanner"""
+        snapshot = self.snapshot()
+        if snapshot is None:
+            return None
+        header = snapshot[0]
+        
+        def text(epoch):
+            return datetime.fromtimestamp(epoch).strftime(self.STATUS_FORMAT) if epoch else None
+        
+        status = {
+            'running': bool(header['running']),
+            'last_scan': text(float(header['last_scan'])),
+            'alerts_today': int(header['alerts_today']),
+        }
+        if header['next_scan']:
+            status['next_scan'] = text(float(header['next_scan']))
+        return status
     
-    # Update today's alert count
-    today = datetime.now().strftime('%Y-%m-%d')
-    today_alerts = [a for a in alerts_history if a['timestamp'].startswith(today)]
-    system_status['alerts_today'] = len(today_alerts)
+    def _records(self, symbol: Optional[str] = None, interval: Optional[str] = None,
+                 updated_after: Optional[float] = None):
+        snapshot = self.snapshot()
+        if snapshot is None:
+            return np.empty(0, _market_state_dtypes()[1])
+        records = snapshot[1]
+        if updated_after is not None:
+            records = records[records['updated'] > updated_after]
+        if symbol is not None:
+            records = records[records['symbol'] == symbol.encode()]
+        if interval is not None:
+            records = records[records['interval'] == interval.encode()]
+        return records
+    
+    def _as_dicts(self, records, distance: Optional[np.ndarray] = None) -> list:
+        signals = {value: name for name, value in self.SIGNALS.items()}
+        rows = []
+        for i, record in enumerate(records):
+            row = {
+                'symbol': record['symbol'].decode(),
+                'interval': record['interval'].decode(),
+                'timestamp': int(record['timestamp']),
+                'price': float(record['price']),
+                'ott': float(record['ott']),
+                'mavg': float(record['mavg']),
+                'direction': int(record['direction']),
+                'signal': signals.get(int(record['signal'])),
+                'last_cross': signals.get(int(record['last_cross'])),
+                'bars_since_cross': int(record['bars_since_cross']) if record['last_cross'] else None,
+                'updated': float(record['updated']),
+            }
+            if distance is not None:
+                row['distance_pct'] = None if np.isnan(distance[i]) else round(float(distance[i]), 4)
+            rows.append(row)
+        return rows
+    
+    def bars(self, symbol: Optional[str] = None, interval: Optional[str] = None,
+             updated_after: Optional[float] = None) -> list:
+        """Reader side: latest bar per (symbol, interval) as plain dicts, optionally only those written after updated_after"""
+        return self._as_dicts(self._records(symbol, interval, updated_after))
+    
+    SCREEN_KEYS = ('distance', 'abs_distance', 'bars_since_cross', 'symbol', 'price', 'timestamp')
+    
+    def screen(self, interval: Optional[str] = None, direction: Optional[int] = None,
+               signal: Optional[str] = None, last_cross: Optional[str] = None,
+               max_bars_since_cross: Optional[int] = None, min_distance: Optional[float] = None,
+               max_distance: Optional[float] = None, sort: str = 'abs_distance',
+               descending: bool = False, limit: Optional[int] = None) -> dict:
+        """
+        Reader side: filter and rank the whole universe with vectorised operations
+        on one snapshot. distance is (price - OTT) / OTT in percent and the distance
+        bounds apply to its absolute value. Records without a crossover yet never
+        pass max_bars_since_cross.
+        """
+        if sort not in self.SCREEN_KEYS:
+            raise ValueError(f"sort must be one of {', '.join(self.SCREEN_KEYS)}")
+        records = self._records(interval=interval)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            distance = (records['price'] - records['ott']) / records['ott'] * 100
+        distance[~np.isfinite(distance)] = np.nan
+        
+        keep = np.ones(len(records), dtype=bool)
+        if direction is not None:
+            keep &= records['direction'] == direction
+        if signal is not None:
+            keep &= records['signal'] == self.SIGNALS[signal]
+        if last_cross is not None:
+            keep &= records['last_cross'] == self.SIGNALS[last_cross]
+        if max_bars_since_cross is not None:
+            keep &= (records['last_cross'] != 0) & (records['bars_since_cross'] <= max_bars_since_cross)
+        with np.errstate(invalid='ignore'):
+            if min_distance is not None:
+                keep &= np.abs(distance) >= min_distance
+            if max_distance is not None:
+                keep &= np.abs(distance) <= max_distance
+        records, distance = records[keep], distance[keep]
+        
+        if sort in ('distance', 'abs_distance'):
+            values = np.abs(distance) if sort == 'abs_distance' else distance
+            # NaN sorts last either way
+            order = np.argsort(-values if descending else values, kind='stable')
+        else:
+            values = records[sort]
+            if sort == 'bars_since_cross':
+                values = np.where(records['last_cross'] != 0, values, np.iinfo(np.int32).max)
+            order = np.argsort(values, kind='stable')
+            if descending:
+                order = order[::-1]
+        if limit is not None:
+            order = order[:limit]
+        return {'total': int(len(records)), 'results': self._as_dicts(records[order], distance[order])}
+
+# 'all' runs scanner and dashboard in one process; production mode splits them
+# into one 'monitor' process and 'web' workers that follow it through the store
+server_role = os.environ.get('OTT_ROLE', 'all')
+
+alert_db = os.environ.get('OTT_ALERT_DB', 'ott_alerts.db')
+alert_store = AlertStore(log=AlertLog(alert_db))
+state_store = StateStore(alert_db)
+# Shared with web workers through a file next to the alert log (process-local for an in-memory log)
+market_state = MarketState(os.environ.get('OTT_MARKET_STATE', None if alert_db == ':memory:' else f"{alert_db}.market"),
+                           int(os.environ.get('OTT_MARKET_SLOTS', '4096')))
+system_status['alerts_today'] = alert_store.count_today()
+
+class EventBroker:
+    """
+    Fan-out of dashboard events to Server-Sent Events subscribers.
+    Each subscriber has a bounded queue; a client too slow to drain it is dropped
+    rather than allowed to slow the scanner down. With max_subscribers set,
+    subscribe() refuses clients beyond it (each one holds a server thread).
+    """
+    
+    def __init__(self, max_queue: int = 256, max_subscribers: Optional[int] = None):
+        self.max_queue = max_queue
+        self.max_subscribers = max_subscribers
+        self.subscribers = set()
+        self.lock = threading.Lock()
+        self.last_status = {}
+    
+    def subscribe(self) -> Optional[queue.Queue]:
+        subscriber = queue.Queue(maxsize=self.max_queue)
+        with self.lock:
+            if self.max_subscribers is not None and len(self.subscribers) >= self.max_subscribers:
+                return None
+            self.subscribers.add(subscriber)
+        metrics.set_gauge('sse_subscribers', len(self.subscribers))
+        return subscriber
+    
+    def unsubscribe(self, subscriber: queue.Queue):
+        with self.lock:
+            self.subscribers.discard(subscriber)
+        metrics.set_gauge('sse_subscribers', len(self.subscribers))
+    
+    def publish(self, event: str, data):
+        if not self.subscribers:
+            return
+        message = f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(message)
+            except queue.Full:
+                self.drop(subscriber)
+    
+    def drop(self, subscriber: queue.Queue):
+        """
+        Disconnect a subscriber that fell behind: its backlog is discarded and a
+        None sentinel ends its stream, so the client reconnects and resyncs
+        """
+        self.unsubscribe(subscriber)
+        metrics.inc('sse_dropped_total')
+        try:
+            while True:
+                subscriber.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            subscriber.put_nowait(None)
+        except queue.Full:
+            pass
+    
+    def publish_status(self, status: dict):
+        """Publish only the status fields that changed since the last publish"""
+        with self.lock:
+            delta = {key: value for key, value in status.items() if self.last_status.get(key) != value}
+            self.last_status = dict(status)
+        if delta:
+            self.publish('status', delta)
+
+event_broker = EventBroker()
+
+def add_alert_to_history(symbol: str, signal_type: str, price: float, interval: Optional[str] = None):
+    """Add alert to history with deduplication"""
+    alert = alert_store.add(symbol, signal_type, price, interval=interval)
+    system_status['alerts_today'] = alert_store.count_today()
+    if alert is not None:
+        event_broker.publish('alert', alert)
+        event_broker.publish_status(system_status)
+
+class _Histogram:
+    __slots__ = ('counts', 'total', 'count')
+    
+    def __init__(self, n_buckets: int):
+        self.counts = [0] * (n_buckets + 1)
+        self.total = 0.0
+        self.count = 0
+
+class ScanMetrics:
+    """
+    In-process timing histograms, counters and gauges for the scanner.
+    Rendered as Prometheus text on /metrics and summarized in /api/status.
+    """
+    
+    BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+        self.gauges = {}
+    
+    def observe(self, name: str, value: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        index = bisect.bisect_left(self.BUCKETS, value)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = _Histogram(len(self.BUCKETS))
+            histogram.counts[index] += 1
+            histogram.total += value
+            histogram.count += 1
+    
+    def inc(self, name: str, amount: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+    
+    def set_gauge(self, name: str, value: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.gauges[key] = value
+    
+    @contextmanager
+    def timer(self, name: str, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+    
+    @staticmethod
+    def _format_labels(labels: tuple, extra: Optional[tuple] = None) -> str:
+        items = list(labels) + ([extra] if extra else [])
+        if not items:
+            return ''
+        return '{' + ','.join(f'{k}="{str(v)}"' for k, v in items) + '}'
+    
+    def render_prometheus(self) -> str:
+        with self.lock:
+            histograms = {key: (list(h.counts), h.total, h.count) for key, h in self.histograms.items()}
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+        
+        lines = []
+        seen = set()
+        for (name, labels), (counts, total, count) in sorted(histograms.items()):
+            if name not in seen:
+                lines.append(f"# TYPE ott_{name} histogram")
+                seen.add(name)
+            cumulative = 0
+            for bound, bucket_count in zip(self.BUCKETS + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f"ott_{name}_bucket{self._format_labels(labels, ('le', le))} {cumulative}")
+            lines.append(f"ott_{name}_sum{self._format_labels(labels)} {total}")
+            lines.append(f"ott_{name}_count{self._format_labels(labels)} {count}")
+        for kind, values in (('counter', counters), ('gauge', gauges)):
+            for (name, labels), value in sorted(values.items()):
+                if name not in seen:
+                    lines.append(f"# TYPE ott_{name} {kind}")
+                    seen.add(name)
+                lines.append(f"ott_{name}{self._format_labels(labels)} {value}")
+        return '\n'.join(lines) + '\n'
+    
+    def summary(self) -> dict:
+        """Compact JSON view; per-symbol series are folded into their totals"""
+        def summary_key(name: str, labels: tuple) -> str:
+            return name + ''.join(f'[{v}]' for k, v in labels if k != 'symbol')
+        
+        with self.lock:
+            stages = {}
+            for (name, labels), h in self.histograms.items():
+                stage = stages.setdefault(summary_key(name, labels), {'count': 0, 'total_s': 0.0})
+                stage['count'] += h.count
+                stage['total_s'] += h.total
+            counters = {}
+            for (name, labels), value in self.counters.items():
+                key = summary_key(name, labels)
+                counters[key] = counters.get(key, 0) + value
+            gauges = {summary_key(name, labels): value for (name, labels), value in self.gauges.items()}
+        
+        for stage in stages.values():
+            stage['mean_s'] = stage['total_s'] / stage['count'] if stage['count'] else 0.0
+        return {'stages': stages, 'counters': counters, 'gauges': gauges}
+
+metrics = ScanMetrics()
+
+def publish_shared_state():
+    """Monitor side: make alerts and status visible to the web workers"""
+    if alert_store.log is not None:
+        alert_store.log.flush()
+        if alert_store.log.max_id() < alert_store.last_id:
+            # Alerts were cleared through a web worker
+            alert_store.restore()
+            system_status['alerts_today'] = alert_store.count_today()
+    market_state.set_status(system_status)
+    state_store.put('metrics', {'summary': metrics.summary(), 'prometheus': metrics.render_prometheus()})
+
+# Fields of the dashboard's 'bar' SSE event
+BAR_EVENT_FIELDS = ('symbol', 'interval', 'timestamp', 'price', 'ott', 'direction')
+
+# Newest market state write this worker has relayed as 'bar' events
+_relayed_bars_until = 0.0
+
+def sync_shared_state():
+    """
+    Web side: pull alerts, status and bars written by the monitor process and
+    fan them out to this worker's SSE subscribers.
+    """
+    global _relayed_bars_until
+    if alert_store.log is not None and alert_store.log.max_id() < alert_store.last_id:
+        # Alerts were cleared through another worker
+        alert_store.restore()
+        event_broker.publish('clear', {})
+    for alert in alert_store.sync():
+        event_broker.publish('alert', alert)
+    status = market_state.status()
+    if status:
+        system_status.update(status)
+    # The synced log also reflects clears made through other workers
+    system_status['alerts_today'] = alert_store.count_today()
+    event_broker.publish_status(system_status)
+    for bar in market_state.bars(updated_after=_relayed_bars_until):
+        _relayed_bars_until = max(_relayed_bars_until, bar['updated'])
+        event_broker.publish('bar', {key: bar[key] for key in BAR_EVENT_FIELDS})
+
+def follow_shared_state(interval: float = 1.0):
+    while True:
+        time.sleep(interval)
+        try:
+            sync_shared_state()
+        except Exception as e:
+            logger.error(f"Error following monitor state: {str(e)}")
+
+_follower_pid = None
+_follower_lock = threading.Lock()
+
+@app.before_request
+def start_state_follower():
+    # Started lazily so each forked worker gets its own thread
+    global _follower_pid
+    if server_role != 'web' or _follower_pid == os.getpid():
+        return
+    with _follower_lock:
+        if _follower_pid != os.getpid():
+            _follower_pid = os.getpid()
+            sync_shared_state()
+            threading.Thread(target=follow_shared_state, name='state-follower', daemon=True).start()
+
+GZIP_MIN_BYTES = 500
+GZIP_MIMETYPES = ('application/json', 'text/html', 'text/plain', 'application/javascript')
+
+@app.after_request
+def gzip_response(response):
+    """Compress JSON/HTML/text bodies for clients that accept gzip"""
+    if (response.direct_passthrough or response.is_streamed or response.status_code < 200
+            or response.status_code >= 300 or 'Content-Encoding' in response.headers
+            or response.mimetype not in GZIP_MIMETYPES
+            or 'gzip' not in request.headers.get('Accept-Encoding', '').lower()):
+        return response
+    body = response.get_data()
+    if len(body) < GZIP_MIN_BYTES:
+        return response
+    response.set_data(gzip.compress(body, compresslevel=5))
+    response.headers['Content-Encoding'] = 'gzip'
+    response.headers['Content-Length'] = str(len(response.get_data()))
+    response.vary.add('Accept-Encoding')
+    return response
+
+_first_response_pid = None
+
+@app.after_request
+def record_first_response(response):
+    # Time-to-first-response from module import, for cold starts and autoscaling
+    global _first_response_pid
+    if _first_response_pid != os.getpid():
+        _first_response_pid = os.getpid()
+        elapsed = time.perf_counter() - STARTED_AT
+        metrics.set_gauge('time_to_first_response_seconds', elapsed)
+        logger.info(f"First response served {elapsed * 1000:.0f} ms after start")
+    return response
+
+PLOTLY_CDN = "https://cdn.plot.ly/plotly-latest.min.js"
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+BROTLI_AVAILABLE = importlib.util.find_spec('brotli') is not None
+
+class StaticAsset:
+    """An immutable response body with its pre-compressed variants"""
+    __slots__ = ('body', 'variants', 'etag', 'mimetype', 'cache_control')
+    
+    def __init__(self, body: bytes, mimetype: str, cache_control: str, source: Optional[str] = None):
+        self.body = body
+        self.mimetype = mimetype
+        self.cache_control = cache_control
+        self.etag = hashlib.sha256(body).hexdigest()[:16]
+        self.variants = {}
+        for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+            # Variants compressed at build time (e.g. plotly.min.js.br) are used as-is
+            if source and os.path.exists(source + suffix) and \
+                    os.path.getmtime(source + suffix) >= os.path.getmtime(source):
+                with open(source + suffix, 'rb') as f:
+                    self.variants[encoding] = f.read()
+        if 'gzip' not in self.variants:
+            self.variants['gzip'] = gzip.compress(body, compresslevel=9)
+        if 'br' not in self.variants and BROTLI_AVAILABLE:
+            import brotli
+            # Quality 11 is ~20x slower than 9; reserve it for small bodies
+            self.variants['br'] = brotli.compress(body, quality=11 if len(body) < 1 << 20 else 9)
+    
+    def response(self) -> Response:
+        encoding = None
+        for candidate in ('br', 'gzip'):
+            if candidate in self.variants and request.accept_encodings[candidate]:
+                encoding = candidate
+                break
+        body = self.variants[encoding] if encoding else self.body
+        response = Response(body, mimetype=self.mimetype)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.headers['Cache-Control'] = self.cache_control
+        response.vary.add('Accept-Encoding')
+        response.set_etag(f"{self.etag}-{encoding}" if encoding else self.etag)
+        return response.make_conditional(request)
+
+class DashboardAssets:
+    """
+    The dashboard page and plotly bundle, prepared once per process instead of
+    rendering the template per request. Plotly is served from a vendored copy
+    (static/plotly.min.js, else the one shipped in the plotly package) under a
+    content-hashed URL so it can be cached for a year; the CDN is the fallback.
+    """
+    
+    def __init__(self, html: str):
+        self.html = html
+        self.lock = threading.Lock()
+        self.plotly_lock = threading.Lock()
+        self.plotly_path = self._find_plotly()
+        self.plotly_name = None
+        self.assets = {}
+    
+    @staticmethod
+    def _find_plotly() -> Optional[str]:
+        candidates = [os.path.join(STATIC_DIR, 'plotly.min.js')]
+        spec = importlib.util.find_spec('plotly')
+        if spec is not None and spec.submodule_search_locations:
+            candidates.append(os.path.join(spec.submodule_search_locations[0], 'package_data', 'plotly.min.js'))
+        return next((path for path in candidates if os.path.exists(path)), None)
+    
+    def get(self, name: str) -> Optional[StaticAsset]:
+        asset = self.assets.get(name)
+        if asset is not None:
+            return asset
+        with self.lock:
+            if 'dashboard' not in self.assets:
+                self._build_page()
+        if name == self.plotly_name:
+            # Compressing the bundle takes ~1s; don't hold up page requests meanwhile
+            with self.plotly_lock:
+                if name not in self.assets:
+                    self.assets[name] = StaticAsset(self._plotly_source, 'application/javascript',
+                                                    'public, max-age=31536000, immutable', self.plotly_path)
+        return self.assets.get(name)
+    
+    def _build_page(self):
+        html = self.html
+        if self.plotly_path:
+            with open(self.plotly_path, 'rb') as f:
+                self._plotly_source = f.read()
+            digest = hashlib.sha256(self._plotly_source).hexdigest()[:12]
+            self.plotly_name = f"plotly-{digest}.min.js"
+            html = html.replace(PLOTLY_CDN, f"/assets/{self.plotly_name}")
+        # Revalidated on every load (cheap, ETag): the page names the current plotly hash,
+        # and only that hash is served, so a stale cached page would reference a 404
+        self.assets['dashboard'] = StaticAsset(html.encode('utf-8'), 'text/html', 'no-cache')
+    
+    def warm(self):
+        """Build every asset ahead of the first request for it"""
+        self.get('dashboard')
+        if self.plotly_name:
+            self.get(self.plotly_name)
+
+dashboard_assets = DashboardAssets(DASHBOARD_HTML)
 
 # Flask Routes
 @app.route('/')
 def dashboard():
-    return render_template_string(DASHBOARD_HTML)
+    return dashboard_assets.get('dashboard').response()
+
+@app.route('/assets/<name>')
+def static_asset(name):
+    asset = dashboard_assets.get(name)
+    if asset is None or name == 'dashboard':
+        return jsonify({'error': 'Not found'}), 404
+    return asset.response()
 
 @app.route('/api/status')
 def api_status():
-    return jsonify(system_status)
+    if server_role == 'web':
+        shared = state_store.get('metrics', {})
+        return jsonify({**system_status, 'metrics': shared.get('summary', {})})
+    return jsonify({**system_status, 'metrics': metrics.summary()})
+
+@app.route('/metrics')
+def api_metrics():
+    if server_role == 'web':
+        text = state_store.get('metrics', {}).get('prometheus', '')
+        return Response(text, mimetype='text/plain; version=0.0.4')
+    return Response(metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/api/alerts')
 def api_alerts():
-    return jsonify(alerts_history)
+    if not any(key in request.args for key in ('since', 'until', 'symbol', 'before_id', 'limit')):
+        return jsonify(alert_store.recent())
+    
+    try:
+        since = _parse_time_arg(request.args.get('since'))
+        until = _parse_time_arg(request.args.get('until'))
+        before_id = request.args.get('before_id', type=int)
+        limit = min(max(request.args.get('limit', 100, type=int), 1), 1000)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if alert_store.log is None:
+        alerts = alert_store.between(since or datetime.min, until, limit=limit)
+        symbol = request.args.get('symbol')
+        return jsonify([a for a in alerts if not symbol or a['symbol'] == symbol])
+    return jsonify(alert_store.log.query(since, until, request.args.get('symbol'), before_id, limit))
+
+def _parse_time_arg(value: Optional[str]) -> Optional[datetime]:
+    """Accept epoch seconds or an ISO / 'YYYY-MM-DD HH:MM:SS' timestamp"""
+    if not value:
+        return None
+    try:
+        epoch = float(value)
+    except ValueError:
+        return datetime.fromisoformat(value)
+    try:
+        return datetime.fromtimestamp(epoch)
+    except (OverflowError, OSError, ValueError) as e:
+        # inf, nan and epochs beyond the platform's range
+        raise ValueError(f"Timestamp out of range: {value}") from e
+
+@app.route('/api/market')
+def api_market():
+    """Latest bar, OTT and direction per symbol and timeframe from the shared market state"""
+    return jsonify(market_state.bars(request.args.get('symbol'), request.args.get('interval')))
+
+@app.route('/api/screener')
+def api_screener():
+    """
+    The whole scanned universe ranked and filtered by OTT state, answered from
+    the scanner-maintained market state without touching market data.
+    ?interval=30m  ?direction=up|down  ?signal=BUY|SELL (within the last 3 bars)
+    ?last_cross=BUY|SELL  ?max_bars=<bars since the last crossover>
+    ?min_distance= / ?max_distance= (|price - OTT| as % of OTT)
+    ?sort=abs_distance|distance|bars_since_cross|symbol|price|timestamp  ?order=asc|desc  ?limit=100
+    """
+    try:
+        direction = request.args.get('direction')
+        if direction is not None:
+            if direction not in ('up', 'down', '1', '-1'):
+                raise ValueError("direction must be up or down")
+            direction = 1 if direction in ('up', '1') else -1
+        signal = request.args.get('signal', type=str.upper)
+        last_cross = request.args.get('last_cross', type=str.upper)
+        for name, value in (('signal', signal), ('last_cross', last_cross)):
+            if value is not None and value not in MarketState.SIGNALS:
+                raise ValueError(f"{name} must be BUY or SELL")
+        order = request.args.get('order', 'asc')
+        if order not in ('asc', 'desc'):
+            raise ValueError("order must be asc or desc")
+        limit = min(max(request.args.get('limit', 100, type=int), 1), 5000)
+        
+        result = market_state.screen(
+            interval=request.args.get('interval'), direction=direction, signal=signal, last_cross=last_cross,
+            max_bars_since_cross=request.args.get('max_bars', type=int),
+            min_distance=request.args.get('min_distance', type=float),
+            max_distance=request.args.get('max_distance', type=float),
+            sort=request.args.get('sort', 'abs_distance'), descending=order == 'desc', limit=limit)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(result)
 
 @app.route('/api/signals')
 def api_signals():
     # Return recent signals (last 24 hours)
-    recent_alerts = []
     cutoff_time = datetime.now() - timedelta(hours=24)
+    return jsonify(alert_store.between(cutoff_time, limit=20))
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling: indices of threshold points
+    that best preserve the visual shape of (x, y)
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
     
-    for alert in alerts_history:
-        alert_time = datetime.strptime(alert['timestamp'], '%Y-%m-%d %H:%M:%S')
-        if alert_time > cutoff_time:
-            recent_alerts.append(alert)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    bucket_size = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, n)
+        avg_x = x[end:next_end].mean() if next_end > end else x[n - 1]
+        avg_y = y[end:next_end].mean() if next_end > end else y[n - 1]
+        areas = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(areas))
+        indices[i + 1] = a
+    return indices
+
+def _epoch_seconds(index: pd.DatetimeIndex) -> np.ndarray:
+    """Integer epoch seconds for a (possibly tz-aware) DatetimeIndex, independent of its unit"""
+    if index.tz is not None:
+        index = index.tz_convert('UTC').tz_localize(None)
+    return index.values.astype('datetime64[s]').astype(np.int64)
+
+def _chart_arrays(bars: BarBuffer, OTT: np.ndarray, since: Optional[int], max_points: Optional[int]):
+    """Epoch-second timestamps plus float64 price/OTT arrays, cut to since= and downsampled"""
+    timestamps = bars.timestamps
+    prices = bars.closes.astype(np.float64)
+    ott = OTT.astype(np.float64)
     
-    return jsonify(recent_alerts[:20])
+    if since is not None:
+        # Inclusive, so a still-forming last bar is resent with its latest values
+        start = int(np.searchsorted(timestamps, since, side='left'))
+        timestamps, prices, ott = timestamps[start:], prices[start:], ott[start:]
+    elif max_points and len(prices) > max_points:
+        keep = lttb_indices(timestamps.astype(np.float64), prices, max_points)
+        timestamps, prices, ott = timestamps[keep], prices[keep], ott[keep]
+    return timestamps.astype(np.int64), prices, ott
 
 @app.route('/api/chart/<symbol>')
 def api_chart(symbol):
+    """
+    Chart series as epoch-second timestamps with price and OTT.
+    ?since=<epoch> returns only bars from that time on, ?max_points=<n> downsamples
+    full loads with LTTB, ?format=binary returns int64 times + float32 price + float32 OTT.
+    Responses carry an ETag and honour If-None-Match.
+    """
     try:
-        data = get_stock_data(symbol, period="5d", interval="30m")
-        if data is None or data.empty:
+        interval = "30m"
+        result = get_cached_ott(symbol, period="5d", interval=interval, length=5, percent=1.5)
+        if result is None:
             return jsonify({'error': 'No data available'})
         
-        MAvg, OTT, dir_series = calculate_ott(data, 5, 1.5)
-        
-        # Store current data for dashboard
-        current_data[symbol] = {
-            'data': data,
-            'MAvg': MAvg,
-            'OTT': OTT,
-            'timestamp': datetime.now()
-        }
-        
-        return jsonify({
-            'timestamps': [str(ts) for ts in data.index],
-            'prices': data['Close'].tolist(),
-            'ott': OTT.tolist()
-        })
+        bars, MAvg, OTT, direction = result
+        since = request.args.get('since', type=int)
+        max_points = request.args.get('max_points', type=int)
+        payload_format = request.args.get('format', 'json')
+        
+        etag = hashlib.sha1(
+            f"{symbol}|{bars.last_timestamp}|{float(bars.closes[-1])!r}|{float(OTT[-1])!r}|{len(bars)}|"
+            f"{since}|{max_points}|{payload_format}".encode()).hexdigest()[:16]
+        if etag in request.if_none_match:
+            return Response(status=304, headers={'ETag': f'"{etag}"'})
+        
+        timestamps, prices, ott = _chart_arrays(bars, OTT, since, max_points)
+        
+        if payload_format == 'binary':
+            # float32 halves the payload; only the binary format trades precision for size
+            response = Response(timestamps.tobytes() + prices.astype(np.float32).tobytes() +
+                                ott.astype(np.float32).tobytes(),
+                                mimetype='application/octet-stream')
+            response.headers['X-Bar-Count'] = str(len(timestamps))
+        else:
+            response = jsonify({
+                'symbol': symbol,
+                'interval': interval,
+                'timestamps': timestamps.tolist(),
+                'prices': np.round(prices, 4).tolist(),
+                'ott': [None if np.isnan(v) else round(float(v), 4) for v in ott],
+                'last': int(timestamps[-1]) if len(timestamps) else since,
+            })
+        response.headers['ETag'] = f'"{etag}"'
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
     except Exception as e:
         logger.error(f"Chart API error: {str(e)}")
         return jsonify({'error': str(e)})
 
+@app.route('/api/stream')
+def api_stream():
+    """Server-Sent Events: status deltas, new alerts and new bars as the scanner produces them"""
+    subscriber = event_broker.subscribe()
+    if subscriber is None:
+        # Every streaming slot of this worker is taken; the dashboard falls back to polling
+        metrics.inc('sse_rejected_total')
+        return jsonify({'error': 'Too many live connections'}), 503, {'Retry-After': '300'}
+    
+    def stream():
+        try:
+            yield f"event: status\ndata: {json.dumps(system_status, default=str)}\n\n"
+            while True:
+                try:
+                    message = subscriber.get(timeout=15)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                if message is None:
+                    # Dropped for falling behind; closing makes EventSource reconnect
+                    return
+                yield message
+        finally:
+            event_broker.unsubscribe(subscriber)
+    
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/api/clear-alerts', methods=['POST'])
 def api_clear_alerts():
-    global alerts_history
-    alerts_history = []
+    alert_store.clear()
     system_status['alerts_today'] = 0
+    event_broker.publish('clear', {})
+    event_broker.publish_status(system_status)
     return jsonify({'success': True})
 
+# NSE sessions open at 09:15 IST (03:45 UTC); bar boundaries are counted from here
+NSE_SESSION_ANCHOR = 3 * 3600 + 45 * 60
+
+class ScanGroup:
+    """
+    Symbols scanned together on one bar interval. Bars are fetched once at
+    base_interval and resampled locally to every entry of timeframes.
+    """
+    __slots__ = ('name', 'symbols', 'interval', 'period', 'offset', 'anchor', 'next_fire',
+                 'base_interval', 'timeframes')
+    
+    def __init__(self, name: str, symbols: list, interval: str = "30m", period: str = "5d",
+                 offset: float = 30.0, anchor: float = NSE_SESSION_ANCHOR,
+                 base_interval: Optional[str] = None, timeframes: Optional[list] = None):
+        self.name = name
+        self.symbols = symbols
+        self.interval = interval
+        self.period = period
+        self.offset = offset
+        self.anchor = anchor
+        self.next_fire = None
+        self.base_interval = base_interval or interval
+        self.timeframes = timeframes or [interval]
+
+class BarScheduler:
+    """
+    Fires scan groups at wall-clock bar closes (anchor + k * interval + offset) instead of
+    sleeping a fixed time after each scan, so the cadence cannot drift. A scan that runs
+    past its group's next boundary is reported as an overrun and the missed ticks are skipped.
+    """
+    
+    def __init__(self, clock=time.time, sleep=time.sleep, max_sleep: float = 5.0):
+        self.clock = clock
+        self.sleep = sleep
+        self.max_sleep = max_sleep
+        self.groups = []
+    
+    def add_group(self, group: ScanGroup, run_immediately: bool = True):
+        now = self.clock()
+        group.next_fire = now if run_immediately else self.next_boundary(group, now)
+        self.groups.append(group)
+    
+    @staticmethod
+    def next_boundary(group: ScanGroup, now: float) -> float:
+        """First bar close (plus offset) strictly after now"""
+        period = _interval_seconds(group.interval)
+        base = group.anchor + group.offset
+        return base + (math.floor((now - base) / period) + 1) * period
+    
+    def wait_due(self, running=lambda: True) -> list:
+        """Block until at least one group is due and return the due groups"""
+        while running():
+            now = self.clock()
+            due = [group for group in self.groups if group.next_fire <= now]
+            if due:
+                return due
+            next_fire = min(group.next_fire for group in self.groups)
+            self.sleep(min(next_fire - now, self.max_sleep))
+        return []
+    
+    def complete(self, group: ScanGroup, started: float):
+        """Schedule the group's next tick after a scan that began at started"""
+        now = self.clock()
+        expected = self.next_boundary(group, started)
+        if now > expected:
+            skipped = int((now - expected) // _interval_seconds(group.interval)) + 1
+            metrics.inc('scan_overruns_total', group=group.name)
+            metrics.inc('scan_ticks_skipped_total', skipped, group=group.name)
+            logger.warning(f"Scan of {group.name} overran its bar close by {now - expected:.1f}s; "
+                           f"skipping {skipped} tick(s)")
+        group.next_fire = self.next_boundary(group, now)
+    
+    def next_fire(self) -> Optional[float]:
+        return min((group.next_fire for group in self.groups), default=None)
+
+def scan_symbols(symbols: list, period: str, interval: str, ott_period: int, ott_percent: float,
+                 dispatcher: Optional[EmailDispatcher] = None, timeframes: Optional[list] = None,
+                 scanner: Optional[ShardedScanner] = None) -> int:
+    """
+    Evaluate one group of symbols, in-process or on a ShardedScanner, and raise
+    their alerts; returns alerts found. Alerts on timeframes other than the first
+    are labelled with the timeframe.
+    """
+    timeframes = timeframes or [interval]
+    if scanner is not None:
+        results = scanner.scan(symbols, period, interval, ott_period, ott_percent, timeframes)
+    else:
+        results = evaluate_symbols(symbols, period, interval, ott_period, ott_percent, timeframes)
+    market_state.publish([result for result in results if result['status'] == 'ok'])
+    return sum(_apply_scan_result(result, timeframes[0], dispatcher) for result in results)
+
+def evaluate_symbols(symbols: list, period: str, interval: str, ott_period: int, ott_percent: float,
+                     timeframes: Optional[list] = None) -> list:
+    """
+    Fetch interval bars once per symbol, derive each of timeframes from them and
+    update their OTT state. Returns one plain result dict per symbol/timeframe.
+    """
+    timeframes = timeframes or [interval]
+    results = []
+    with metrics.timer('scan_stage_seconds', stage='fetch'):
+        frames = fetch_stock_data_many(symbols, period=period, interval=interval)
+    
+    for symbol in symbols:
+        data = frames.get(symbol)
+        if data is None or len(data) <= 20:
+            logger.warning(f"Unable to fetch data for {symbol}")
+            results.append({'status': 'no_data', 'symbol': symbol, 'interval': timeframes[0]})
+            continue
+        
+        for timeframe in timeframes:
+            try:
+                with metrics.timer('scan_stage_seconds', stage='resample'):
+                    bars = resample_bars(symbol, data, interval, timeframe)
+                if bars is None or len(bars) <= 20:
+                    logger.warning(f"Insufficient {timeframe} bars for {symbol}")
+                    continue
+                results.append(evaluate_bars(symbol, bars, period, timeframe, ott_period, ott_percent))
+            except Exception as e:
+                logger.error(f"Error processing {symbol} {timeframe}: {str(e)}")
+                results.append({'status': 'error', 'symbol': symbol, 'interval': timeframe})
+    return results
+
+def evaluate_bars(symbol: str, bars: BarBuffer, period: str, interval: str,
+                  ott_period: int, ott_percent: float) -> dict:
+    """
+    Update one symbol/timeframe OTT state and report its latest bar and signal.
+    The result carries a snapshot of the bars for the process that applies it
+    (the scanning shard may be another process) to publish to the chart cache.
+    """
+    symbol_start = time.perf_counter()
+    state = update_ott_state(symbol, bars, ott_period, ott_percent, interval)
+    
+    signal_type = None
+    if any(buy for buy, _ in state.recent_signals):
+        signal_type = "BUY"
+    elif any(sell for _, sell in state.recent_signals):
+        signal_type = "SELL"
+    return {
+        'status': 'ok',
+        'symbol': symbol,
+        'interval': interval,
+        'timestamp': bars.last_timestamp,
+        'price': float(bars.closes[-1]),
+        'ott': state.ott_history[-1],
+        'mavg': state.mavg_history[-1],
+        'direction': state.direction,
+        'signal': signal_type,
+        'last_cross': {1: 'BUY', -1: 'SELL'}.get(state.last_signal),
+        'bars_since_cross': state.bars_since_signal,
+        'period': period,
+        'bars': bars.copy(),
+        'indicator_seconds': time.perf_counter() - symbol_start,
+    }
+
+def _apply_scan_result(result: dict, primary_interval: str, dispatcher: Optional[EmailDispatcher]) -> int:
+    """Publish one evaluate_bars result and raise its alert, if any; returns alerts raised"""
+    symbol = result['symbol']
+    if result['status'] == 'no_data':
+        metrics.inc('symbols_without_data_total', symbol=symbol)
+        return 0
+    if result['status'] == 'error':
+        metrics.inc('symbol_errors_total', symbol=symbol)
+        return 0
+    
+    store_cached_stock_data(symbol, result['bars'], period=result['period'], interval=result['interval'])
+    event_broker.publish('bar', {key: result[key] for key in BAR_EVENT_FIELDS})
+    metrics.observe('scan_stage_seconds', result['indicator_seconds'], stage='indicator')
+    metrics.observe('indicator_symbol_seconds', result['indicator_seconds'], symbol=symbol)
+    
+    signal_type = result['signal']
+    if signal_type is None:
+        return 0
+    # The interval only goes into the label for logs and email; the alert keeps a clean symbol
+    label = symbol if result['interval'] == primary_interval else f"{symbol} ({result['interval']})"
+    current_price = result['price']
+    logger.info(f"{signal_type} Signal - {label} at ₹{current_price:.2f}")
+    add_alert_to_history(symbol, signal_type, current_price, result['interval'])
+    if dispatcher is not None:
+        dispatcher.submit(label, signal_type, current_price)
+    return 1
+
+def _scan_shard_worker(conn, shard: int, shards: int, clock_start: Optional[float] = None):
+    """
+    Request loop of one ShardedScanner process. OTT and resampler state live in
+    this process's module globals and persist between scans.
+    """
+    global fetch_rate_limiter
+    # Replay sources run on the parent's clock (time.monotonic() is system-wide)
+    if clock_start is not None:
+        data_source.start_clock(clock_start)
+    # The shards split the upstream request budget between them
+    fetch_rate_limiter = TokenBucket(fetch_rate_limiter.rate / shards,
+                                     max(1.0, fetch_rate_limiter.capacity / shards))
+    # Pay for the deferred imports and JIT compilation before the first scan
+    calculate_ott(generate_random_walk('warmup', bars=50))
+    try:
+        while True:
+            try:
+                message = conn.recv()
+            except EOFError:
+                break
+            if message[0] == 'stop':
+                break
+            _, symbols, period, interval, ott_period, ott_percent, timeframes = message
+            start = time.perf_counter()
+            results = evaluate_symbols(symbols, period, interval, ott_period, ott_percent, timeframes)
+            conn.send((results, time.perf_counter() - start))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        conn.close()
+
+class ShardedScanner:
+    """
+    Splits the watchlist across worker processes so indicator work can use every
+    core. Symbols are pinned to a shard by hash, so each worker keeps its own
+    per-symbol state between scans; only small result dicts cross the pipe.
+    """
+    
+    def __init__(self, shards: Optional[int] = None, timeout: float = 600.0):
+        self.shards = shards or os.cpu_count() or 1
+        self.timeout = timeout
+        # Spawned, not forked: the parent runs Flask, SQLite and dispatcher threads
+        self.context = multiprocessing.get_context('spawn')
+        self.workers = [None] * self.shards
+    
+    def shard_of(self, symbol: str) -> int:
+        return zlib.crc32(symbol.encode()) % self.shards
+    
+    def _start_worker(self, shard: int):
+        parent_conn, child_conn = self.context.Pipe()
+        process = self.context.Process(target=_scan_shard_worker,
+                                       args=(child_conn, shard, self.shards, data_source.wall_start),
+                                       name=f"ott-shard-{shard}", daemon=True)
+        process.start()
+        child_conn.close()
+        self.workers[shard] = (process, parent_conn)
+    
+    def _stop_worker(self, shard: int, timeout: float = 5.0):
+        worker = self.workers[shard]
+        if worker is None:
+            return
+        process, conn = worker
+        try:
+            conn.send(('stop',))
+        except (OSError, ValueError):
+            pass
+        process.join(timeout)
+        if process.is_alive():
+            process.terminate()
+            process.join(timeout)
+        conn.close()
+        self.workers[shard] = None
+    
+    def start(self):
+        for shard in range(self.shards):
+            if self.workers[shard] is None:
+                self._start_worker(shard)
+    
+    def scan(self, symbols: list, period: str, interval: str, ott_period: int, ott_percent: float,
+             timeframes: Optional[list] = None) -> list:
+        """Scan symbols on their shards in parallel; returns the evaluate_bars results"""
+        timeframes = timeframes or [interval]
+        assignments = [[] for _ in range(self.shards)]
+        for symbol in symbols:
+            assignments[self.shard_of(symbol)].append(symbol)
+        
+        sent = []
+        for shard, shard_symbols in enumerate(assignments):
+            if not shard_symbols:
+                continue
+            if self.workers[shard] is None or not self.workers[shard][0].is_alive():
+                self._stop_worker(shard)
+                self._start_worker(shard)
+            self.workers[shard][1].send(('scan', shard_symbols, period, interval,
+                                         ott_period, ott_percent, timeframes))
+            sent.append(shard)
+        
+        results = []
+        for shard in sent:
+            conn = self.workers[shard][1]
+            try:
+                if not conn.poll(self.timeout):
+                    raise TimeoutError(f"no reply in {self.timeout:.0f}s")
+                shard_results, elapsed = conn.recv()
+                metrics.observe('shard_scan_seconds', elapsed, shard=str(shard))
+                results.extend(shard_results)
+            except (EOFError, OSError, TimeoutError) as e:
+                # The shard is restarted on the next scan; its state is rebuilt from fresh bars
+                logger.error(f"Scan shard {shard} failed: {str(e)}")
+                metrics.inc('shard_failures_total', shard=str(shard))
+                self._stop_worker(shard)
+                results.extend({'status': 'error', 'symbol': symbol, 'interval': timeframes[0]}
+                               for symbol in assignments[shard])
+        return results
+    
+    def stop(self):
+        for shard in range(self.shards):
+            self._stop_worker(shard)
+
 def monitoring_loop():
     """Main monitoring loop running in background thread"""
     global system_status
     
-    watchlist = [
-        "^NSEI",
-        "^BSESN",
-        "^NSEBANK"
+    # Each group is scanned just after its own bar closes
+    symbol_groups = [
+        ScanGroup("indices", ["^NSEI", "^BSESN", "^NSEBANK"], interval="30m", period="5d", offset=30.0,
+                  base_interval="5m", timeframes=["30m", "1h"]),
     ]
     
     email_settings = {
@@ -789,73 +3793,207 @@ def monitoring_loop():
     
     ott_period = 5
     ott_percent = 1.5
-    scan_interval = 300
+    
+    # Split scanning across worker processes for large watchlists (0 = scan in this thread)
+    scan_shards = int(os.environ.get('OTT_SCAN_SHARDS', '0'))
     
     system_status['running'] = True
+    market_state.reset()
+    data_source.start_clock()
     logger.info("Starting OTT Alert Monitoring")
     
-    while system_status['running']:
-        try:
-            logger.info(f"Starting new scan at {datetime.now()}")
-            alerts_found = 0
-            system_status['last_scan'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            
-            for symbol in watchlist:
-                try:
-                    data = get_stock_data(symbol, period="5d", interval="30m")
-                    
-                    if data is not None and len(data) > 20:
-                        MAvg, OTT, dir_series = calculate_ott(data, ott_period, ott_percent)
-                        buy_signals, sell_signals = detect_signals(MAvg, OTT)
-                        
-                        recent_buy = buy_signals.tail(3).any()
-                        recent_sell = sell_signals.tail(3).any()
-                        current_price = data['Close'].iloc[-1]
-                        
-                        if recent_buy:
-                            alerts_found += 1
-                            logger.info(f"BUY Signal - {symbol} at ₹{current_price:.2f}")
-                            add_alert_to_history(symbol, "BUY", current_price)
-                            if email_settings.get('enabled', False):
-                                send_email_alert(symbol, "BUY", current_price, email_settings)
-                        
-                        elif recent_sell:
-                            alerts_found += 1
-                            logger.info(f"SELL Signal - {symbol} at ₹{current_price:.2f}")
-                            add_alert_to_history(symbol, "SELL", current_price)
-                            if email_settings.get('enabled', False):
-                                send_email_alert(symbol, "SELL", current_price, email_settings)
-                        
-                    else:
-                        logger.warning(f"Unable to fetch data for {symbol}")
+    dispatcher = None
+    if email_settings.get('enabled', False):
+        dispatcher = EmailDispatcher(email_settings)
+        dispatcher.start()
+    
+    scanner = None
+    if scan_shards > 0:
+        scanner = ShardedScanner(scan_shards)
+        scanner.start()
+    
+    scheduler = BarScheduler(clock=data_source.time, sleep=data_source.sleep)
+    for group in symbol_groups:
+        scheduler.add_group(group)
+    
+    try:
+        while system_status['running']:
+            try:
+                due = scheduler.wait_due(lambda: system_status['running'])
+                if not due:
+                    break
+                for group in due:
+                    logger.info(f"Starting new scan of {group.name} at {datetime.now()}")
+                    started = scheduler.clock()
+                    scan_start = time.perf_counter()
+                    system_status['last_scan'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
                     
-                    time.sleep(0.5)  # Prevent rate limiting
+                    alerts_found = scan_symbols(group.symbols, group.period, group.base_interval,
+                                                ott_period, ott_percent, dispatcher, group.timeframes, scanner)
+                    if dispatcher is not None:
+                        dispatcher.flush()
                     
-                except Exception as e:
-                    logger.error(f"Error processing {symbol}: {str(e)}")
+                    metrics.observe('scan_seconds', time.perf_counter() - scan_start)
+                    metrics.inc('scans_total')
+                    metrics.inc('alerts_total', alerts_found)
+                    scheduler.complete(group, started)
+                    logger.info(f"Scan of {group.name} completed. Found {alerts_found} alerts.")
+                    event_broker.publish_status(system_status)
+                
+                next_fire = scheduler.next_fire()
+                if next_fire is not None:
+                    system_status['next_scan'] = datetime.fromtimestamp(next_fire).strftime('%Y-%m-%d %H:%M:%S')
+                    logger.info(f"Next scan at {system_status['next_scan']}")
+                if server_role == 'monitor':
+                    publish_shared_state()
+                
+            except Exception as e:
+                logger.error(f"Error in monitoring loop: {str(e)}")
+                time.sleep(60)  # Wait before retrying
+    finally:
+        # Also runs when a SIGTERM interrupts the monitor process
+        if scanner is not None:
+            scanner.stop()
+        if dispatcher is not None:
+            dispatcher.stop(timeout=30)
+        if server_role == 'monitor':
+            publish_shared_state()
+
+def run_monitor():
+    """Entry point of the standalone monitor process"""
+    global server_role
+    import signal
+    server_role = 'monitor'
+    if 'OTT_CLOCK_START' in os.environ:
+        # Share the replay clock of the web workers that spawned us
+        data_source.start_clock(float(os.environ['OTT_CLOCK_START']))
+    
+    def stop(_signum, _frame):
+        # The production server stops us with terminate(); unwind like Ctrl-C,
+        # ignoring a repeated SIGTERM so it cannot cut the cleanup short
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        raise KeyboardInterrupt
+    signal.signal(signal.SIGTERM, stop)
+    
+    try:
+        monitoring_loop()
+    except KeyboardInterrupt:
+        system_status['running'] = False
+        publish_shared_state()
+    finally:
+        # Commit the alert log's pending batch before the process exits
+        if alert_store.log is not None:
+            alert_store.log.close()
+
+def start_dashboard_server(host: str = '0.0.0.0', port: int = 5000, on_listening=None):
+    """
+    Start the Flask development server (single process, scanner in a thread).
+    The socket is bound before on_listening runs, so start-up work started there
+    does not delay the first request.
+    """
+    from werkzeug.serving import make_server
+    
+    httpd = make_server(host, port, app, threaded=True)
+    logger.info(f"Starting dashboard server on http://localhost:{port}")
+    if on_listening is not None:
+        on_listening()
+    httpd.serve_forever()
+
+def start_production_server(host: str = '0.0.0.0', port: int = 5000, workers: int = 2, threads: int = 8,
+                            scanner: bool = True):
+    """
+    Run the scanner in its own process and serve the dashboard from a
+    multi-worker WSGI server (gunicorn, else waitress). Workers share alerts and
+    status with the monitor through the SQLite store.
+    """
+    global server_role
+    import subprocess
+    
+    # Forked workers inherit the started clock; the monitor is told where it started
+    data_source.start_clock()
+    env = dict(os.environ)
+    if data_source.wall_start is not None:
+        env['OTT_CLOCK_START'] = repr(data_source.wall_start)
+    
+    # A plain child process rather than multiprocessing, whose bookkeeping the
+    # forked gunicorn workers would otherwise inherit
+    monitor = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--monitor'], env=env) if scanner else None
+    master_pid = os.getpid()
+    server_role = 'web'
+    
+    try:
+        if importlib.util.find_spec('gunicorn') is not None:
+            from gunicorn.app.base import BaseApplication
             
-            logger.info(f"Scan completed. Found {alerts_found} alerts.")
-            logger.info(f"Sleeping for {scan_interval} seconds...")
-            time.sleep(scan_interval)
+            class DashboardApplication(BaseApplication):
+                def load_config(self):
+                    self.cfg.set('bind', f"{host}:{port}")
+                    self.cfg.set('workers', workers)
+                    # gthread holds a request thread for the whole life of each SSE connection,
+                    # so event_broker caps streams per worker and the rest poll instead
+                    self.cfg.set('worker_class', 'gthread')
+                    self.cfg.set('threads', threads)
+                    self.cfg.set('keepalive', 5)
+                    self.cfg.set('timeout', 60)
+                    self.cfg.set('graceful_timeout', 10)
+                    self.cfg.set('preload_app', False)
+                
+                def load(self):
+                    return app
             
-        except Exception as e:
-            logger.error(f"Error in monitoring loop: {str(e)}")
-            time.sleep(60)  # Wait before retrying
-
-def start_dashboard_server():
-    """Start the Flask dashboard server"""
-    logger.info("Starting dashboard server on http://localhost:5000")
-    app.run(host='0.0.0.0', port=5000, debug=False, threaded=True)
+            # Forked workers inherit the cap; half of each worker's threads stay free for requests
+            event_broker.max_subscribers = max(1, threads // 2)
+            logger.info(f"Starting gunicorn on http://{host}:{port} ({workers} workers x {threads} threads)")
+            DashboardApplication().run()
+        elif importlib.util.find_spec('waitress') is not None:
+            from waitress import serve
+            # Waitress has the same one-thread-per-stream model
+            event_broker.max_subscribers = max(1, threads * workers // 2)
+            logger.info(f"Starting waitress on http://{host}:{port} ({threads} threads)")
+            serve(app, host=host, port=port, threads=threads * workers, channel_timeout=60,
+                  connection_limit=1000)
+        else:
+            logger.warning("Neither gunicorn nor waitress is installed; using the Flask development server")
+            start_dashboard_server(host, port)
+    finally:
+        if monitor is not None and os.getpid() == master_pid:
+            monitor.terminate()
+            try:
+                monitor.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                monitor.kill()
 
 def main():
     """Main function with dashboard integration"""
+    parser = argparse.ArgumentParser(description="OTT alert scanner and dashboard")
+    parser.add_argument('--production', action='store_true',
+                        help="Run the scanner in its own process behind a multi-worker WSGI server")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--monitor', action='store_true', help="Run only the scanner (started by --production)")
+    parser.add_argument('--no-scanner', action='store_true', default=os.environ.get('OTT_SCANNER', '1') == '0',
+                        help="Serve the dashboard without scanning or sending alert emails (OTT_SCANNER=0)")
+    args = parser.parse_args()
+    
     try:
-        # Start monitoring in background thread
-        monitoring_thread = threading.Thread(target=monitoring_loop, daemon=True)
-        monitoring_thread.start()
+        if args.monitor:
+            run_monitor()
+            return
+        if args.production:
+            start_production_server(args.host, args.port, args.workers, args.threads, scanner=not args.no_scanner)
+            return
+        
+        def start_background():
+            # Start monitoring in background thread
+            if not args.no_scanner:
+                monitoring_thread = threading.Thread(target=monitoring_loop, daemon=True)
+                monitoring_thread.start()
+            threading.Thread(target=dashboard_assets.warm, name='asset-warmup', daemon=True).start()
         
         # Start dashboard server (this will block)
-        start_dashboard_server()
+        start_dashboard_server(args.host, args.port, on_listening=start_background)
         
     except KeyboardInterrupt:
         logger.info("Shutting down OTT Alert System")
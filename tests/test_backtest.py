@@ -0,0 +1,27 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+os.environ.setdefault('OTT_ALERT_DB', ':memory:')
+from backtest import backtest_signals
+from server import calculate_ott, generate_random_walk
+
+def test_short_trade_returns_compound_to_equity():
+    data = generate_random_walk('BT', bars=3000)
+    MAvg, OTT, _ = calculate_ott(data)
+    result = backtest_signals(data, MAvg, OTT, slippage=0.001, allow_short=True)
+
+    trades = result['trades']
+    assert (trades['side'] == 'SHORT').any()
+    compounded = np.prod(1 + trades['return'].to_numpy(dtype=np.float64)) - 1
+    assert np.isclose(compounded, result['total_return'], rtol=1e-9, atol=1e-12)
+
+def test_empty_input_returns_empty_result():
+    data = pd.DataFrame(columns=['Open', 'High', 'Low', 'Close', 'Volume'], dtype=np.float64)
+    empty = pd.Series(dtype=np.float64)
+    result = backtest_signals(data, empty, empty)
+
+    assert result['num_trades'] == 0
+    assert result['pnl'] == 0.0
+    assert result['equity'].empty
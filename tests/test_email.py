@@ -0,0 +1,37 @@
+import email
+import os
+
+os.environ.setdefault('OTT_ALERT_DB', ':memory:')
+from server import EmailDispatcher, MemorySMTPSink
+
+EMAIL_SETTINGS = {
+    'smtp_server': 'localhost',
+    'smtp_port': 25,
+    'email': 'alerts@example.com',
+    'password': 'secret',
+    'recipient': 'trader@example.com',
+}
+
+def test_dispatcher_sends_one_digest_per_flush_over_one_connection():
+    connections = []
+    create = MemorySMTPSink.factory()
+
+    def factory(host, port, timeout=None):
+        connections.append((host, port))
+        return create(host, port, timeout)
+
+    dispatcher = EmailDispatcher(EMAIL_SETTINGS, smtp_factory=factory)
+    dispatcher.start()
+    dispatcher.submit('^NSEI', 'BUY', 22000.5)
+    dispatcher.submit('^BSESN', 'BUY', 72000.0)
+    dispatcher.submit('^NSEBANK', 'SELL', 48000.25)
+    dispatcher.flush()
+    dispatcher.submit('^NSEI (1h)', 'SELL', 21950.0)
+    dispatcher.stop(timeout=10)
+
+    assert len(create.outbox) == 2
+    assert len(connections) == 1
+    digest, single = (email.message_from_string(msg) for _, _, msg in create.outbox)
+    assert digest['Subject'] == "OTT Alert: 3 Signals (^NSEI, ^BSESN, ^NSEBANK)"
+    assert single['Subject'] == "OTT Alert: SELL Signal for ^NSEI (1h)"
+    assert all(to == EMAIL_SETTINGS['recipient'] for _, to, _ in create.outbox)
@@ -0,0 +1,39 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+os.environ.setdefault('OTT_ALERT_DB', ':memory:')
+from server import (OTTState, calculate_ott_arrays, detect_signals_array, generate_random_walk,
+                    signal_position, sweep_ott_parameters)
+
+def test_streaming_state_matches_batch_arrays():
+    closes = generate_random_walk('STREAM', bars=2000)['Close'].to_numpy()
+    MAvg, OTT, direction = calculate_ott_arrays(closes, length=5, percent=1.5)
+
+    state = OTTState(length=5, percent=1.5)
+    streamed = np.array([state.update(close) for close in closes])
+
+    np.testing.assert_allclose(streamed[:, 0], MAvg, rtol=1e-12)
+    np.testing.assert_allclose(streamed[:, 1], OTT, rtol=1e-12)
+    np.testing.assert_array_equal(streamed[:, 2], direction)
+
+def test_parameter_sweep_matches_per_parameter_loop():
+    data = generate_random_walk('SWEEP', bars=1500)
+    closes = data['Close'].to_numpy()
+    lengths, percents = [3, 5, 8], [0.5, 1.5, 3.0]
+
+    rows = []
+    for length in lengths:
+        for percent in percents:
+            MAvg, OTT, _ = calculate_ott_arrays(closes, length, percent)
+            buy, sell = detect_signals_array(MAvg, OTT)
+            position = signal_position(buy, sell)
+            total_return = np.prod(1 + position[:-1] * (closes[1:] / closes[:-1] - 1)) - 1
+            rows.append([length, percent, buy.sum(), sell.sum(), total_return, position.mean()])
+    expected = pd.DataFrame(rows, columns=['length', 'percent', 'buy_signals', 'sell_signals',
+                                           'total_return', 'exposure'])
+
+    for processes in (None, 2):
+        swept = sweep_ott_parameters(data, lengths, percents, processes=processes)
+        pd.testing.assert_frame_equal(swept, expected, check_dtype=False, rtol=1e-9)
@@ -0,0 +1,51 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+os.environ.setdefault('OTT_ALERT_DB', ':memory:')
+from server import OHLCVResampler
+
+AGGREGATIONS = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+
+def session_bars(days: int = 8, seed: int = 1) -> pd.DataFrame:
+    """5m NSE session bars (09:15-15:30 IST) for consecutive business days"""
+    rng = np.random.default_rng(seed)
+    index = pd.DatetimeIndex([day + pd.Timedelta(hours=9, minutes=15 + 5 * i)
+                              for day in pd.bdate_range('2024-03-04', periods=days) for i in range(75)])
+    index = index.tz_localize('Asia/Kolkata')
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, len(index))))
+    open_ = np.r_[close[0], close[:-1]]
+    spread = np.abs(rng.normal(0, 0.002, len(index))) * close
+    return pd.DataFrame({
+        'Open': open_,
+        'High': np.maximum(open_, close) + spread,
+        'Low': np.minimum(open_, close) - spread,
+        'Close': close,
+        'Volume': rng.integers(1000, 100000, len(index)).astype(np.float64),
+    }, index=index)
+
+@pytest.mark.parametrize('interval, rule, offset', [
+    ('15m', '15min', None),
+    ('30m', '30min', '15min'),
+    ('1h', '1h', '15min'),
+    ('1d', '1D', None),
+])
+def test_incremental_resample_matches_pandas(interval, rule, offset):
+    base = session_bars()
+    day_starts = np.flatnonzero(np.r_[True, base.index.normalize()[1:] != base.index.normalize()[:-1]])
+    rng = np.random.default_rng(2)
+    resampler = OHLCVResampler(interval, '5m')
+
+    # Like a rolling "5d" fetch: the window starts at a session open and grows a few bars per scan
+    end = 0
+    while end < len(base):
+        end = min(len(base), end + int(rng.integers(1, 8)))
+        start = day_starts[max(0, np.searchsorted(day_starts, end, side='right') - 5)]
+        window = base.iloc[start:end]
+
+        resampled = resampler.update(window).to_frame()
+        expected = window.resample(rule, offset=offset).agg(AGGREGATIONS).dropna()
+        expected.index = expected.index.as_unit('s')
+        pd.testing.assert_frame_equal(resampled, expected, check_freq=False, check_exact=True)